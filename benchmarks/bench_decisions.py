@@ -0,0 +1,78 @@
+"""
+Benchmark decision throughput: scalar decide_energy_distribution vs the
+vectorized batch path, plus per-call latency of a single decision.
+
+Usage (from the project root):
+    python -m benchmarks.bench_decisions [households]
+"""
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from src.decisions.batch import decide_energy_distribution_batch
+from src.decisions.trading import decide_energy_distribution, read_price_csv
+
+
+def random_households(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    max_storage = rng.choice([0.0, 5.0, 13.5, 40.0], n)
+    return dict(
+        production=rng.uniform(0, 10, n),
+        consumption=rng.uniform(0, 10, n),
+        current_storage=rng.uniform(0, 1, n) * max_storage,
+        max_storage=max_storage,
+        hour=rng.integers(0, 24, n),
+        p2p_price=rng.uniform(0.05, 0.6, n),
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    table = read_price_csv()
+    households = random_households(n)
+
+    # Warm up the per-table look-ahead context
+    decide_energy_distribution_batch(grid_prices=table, **random_households(10))
+
+    start = time.perf_counter()
+    batch = decide_energy_distribution_batch(grid_prices=table, **households)
+    batch_seconds = time.perf_counter() - start
+    print(f"Batch:  {n} households in {batch_seconds * 1e3:.1f} ms ({n / batch_seconds / 1e6:.2f} M households/s)")
+
+    sample = min(n, 20_000)
+    start = time.perf_counter()
+    scalar = [
+        decide_energy_distribution(
+            production=households["production"][i],
+            consumption=households["consumption"][i],
+            current_storage=households["current_storage"][i],
+            max_storage=households["max_storage"][i],
+            grid_prices=table,
+            hour=int(households["hour"][i]),
+            p2p_price=households["p2p_price"][i],
+        )
+        for i in range(sample)
+    ]
+    scalar_seconds = time.perf_counter() - start
+    print(f"Scalar: {sample} households in {scalar_seconds * 1e3:.1f} ms ({sample / scalar_seconds / 1e6:.3f} M households/s)")
+
+    mismatches = sum(
+        any(scalar[i][k] != batch[k][i] for k in range(4))
+        for i in range(sample)
+    )
+    print(f"Mismatches vs scalar on {sample} households: {mismatches}")
+
+    # Single decisions: scalar fast path vs sending one household through the batch path
+    single = dict(production=2.0, consumption=5.0, current_storage=4.0, max_storage=13.5, hour=7, p2p_price=0.2)
+    single_array = {name: np.array([value]) for name, value in single.items()}
+    for name, kwargs in (("scalar fast path", single), ("1-element arrays (batch path)", single_array)):
+        seconds = min(timeit.repeat(
+            lambda: decide_energy_distribution(grid_prices=table, **kwargs), number=20_000, repeat=5
+        )) / 20_000
+        print(f"Single decision, {name}: {seconds * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
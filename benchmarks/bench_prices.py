@@ -0,0 +1,64 @@
+"""
+Benchmark price loading and lookups: pandas adapter vs the default pandas-free path.
+
+Usage (from the project root):
+    python -m benchmarks.bench_prices [grid_prices.csv]
+"""
+import subprocess
+import sys
+import timeit
+
+
+def import_seconds(statement: str, repeat: int = 5) -> float:
+    """Best-of-N wall time of an import in a fresh interpreter"""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    return min(
+        float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+        for _ in range(repeat)
+    )
+
+
+def per_call(statement, number: int) -> float:
+    """Best-of-5 time per call in seconds"""
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number
+
+
+def report(name: str, seconds: float):
+    if seconds >= 1e-3:
+        print(f"  {name:<44} {seconds * 1e3:10.2f} ms")
+    else:
+        print(f"  {name:<44} {seconds * 1e6:10.2f} us")
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "grid_prices.csv"
+
+    print("Import time")
+    report("src.decisions.trading (pandas-free)", import_seconds("import src.decisions.trading"))
+    report("src.decisions.trading + pandas (before)", import_seconds("import pandas; import src.decisions.trading"))
+
+    from src.decisions.trading import (
+        PriceTable, decide_energy_distribution, get_grid_prices_for_hour, load_grid_prices, read_price_csv
+    )
+
+    print(f"Loading {path}")
+    report("pandas read_csv + from_dataframe (before)", per_call(lambda: PriceTable.from_dataframe(load_grid_prices(path)), 20))
+    report("csv module read_price_csv", per_call(lambda: read_price_csv(path), 20))
+
+    frame = load_grid_prices(path)
+    table = read_price_csv(path)
+    hours = range(24)
+
+    print("Price lookup (per hour)")
+    report("DataFrame get_grid_prices_for_hour (before)", per_call(lambda: [get_grid_prices_for_hour(frame, h) for h in hours], 200) / 24)
+    report("PriceTable get_grid_prices_for_hour", per_call(lambda: [get_grid_prices_for_hour(table, h) for h in hours], 2000) / 24)
+    report("PriceTable array read", per_call(lambda: [table.purchase[h] for h in hours], 2000) / 24)
+
+    print("decide_energy_distribution (per call)")
+    kwargs = dict(production=2.0, consumption=5.0, current_storage=4.0, max_storage=13.5, hour=7, p2p_price=0.2)
+    report("with DataFrame (converted per call)", per_call(lambda: decide_energy_distribution(grid_prices=frame, **kwargs), 50))
+    report("with PriceTable", per_call(lambda: decide_energy_distribution(grid_prices=table, **kwargs), 5000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark the counterfactual savings engine: one day of 15-minute decisions for
+many households per chunk, extrapolated to a year.
+
+Usage (from the project root):
+    python -m benchmarks.bench_savings [households]
+"""
+import sys
+import time
+
+import numpy as np
+
+from src.decisions.savings import SavingsEngine
+from src.decisions.trading import PriceTable, read_price_csv
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    hourly = read_price_csv()
+    table = PriceTable(np.repeat(hourly.purchase, 4), np.repeat(hourly.sale, 4), slot_minutes=15)
+    slots = np.arange(len(table))
+
+    rng = np.random.default_rng(0)
+    day = dict(
+        production=rng.uniform(0, 3, (n, len(slots))),
+        consumption=rng.uniform(0, 3, (n, len(slots))),
+        buy_from_grid=rng.uniform(0, 2, (n, len(slots))),
+        sell_to_grid=rng.uniform(0, 2, (n, len(slots))),
+        sell_to_p2p=rng.uniform(0, 1, (n, len(slots))),
+    )
+
+    engine = SavingsEngine(n, table)
+    start = time.perf_counter()
+    engine.add(slots=slots, p2p_price=0.1, **day)
+    seconds = time.perf_counter() - start
+    print(f"One day, {n} households x {len(slots)} slots: {seconds * 1e3:.1f} ms "
+          f"({engine.decisions / seconds / 1e6:.1f} M decisions/s)")
+    print(f"Estimated year: {seconds * 365:.0f} s")
+    for name, value in engine.summary().items():
+        print(f"  {name}: {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
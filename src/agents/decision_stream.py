@@ -0,0 +1,185 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Type
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest accepted input line (bytes); a longer line closes the connection
+MAX_LINE_BYTES = 1 << 20
+
+
+class DecisionStreamServer:
+    """
+    Newline-delimited JSON decisions over long-lived TCP connections.
+
+    A client writes one DecisionInput per line and reads one line back per
+    input, in the same order: the DecisionOutput, or {"error": ...} when the
+    line could not be parsed or decided. Each connection runs two tasks:
+
+    - a reader that parses lines into a bounded queue of max_pending items.
+      When the queue is full the reader stops reading, the socket's receive
+      buffer fills up and TCP flow control slows the client down.
+    - a batcher that takes up to max_batch queued inputs (waiting at most
+      max_delay seconds after the first one for more to arrive), decides them
+      in one call to decide_batch and writes the results, waiting for the
+      client to read them before taking the next batch.
+
+    An input that cannot be parsed or decided gets its own error line and
+    does not affect the rest of its batch; decide_batch reports such inputs
+    per input. Only if decide_batch itself raises (e.g. the executor failed)
+    do the inputs of that batch all get the error.
+
+    Memory per connection is therefore bounded by max_pending inputs plus one
+    batch of outputs, however fast the client sends or slowly it reads.
+    """
+
+    def __init__(
+        self,
+        input_model: Type,
+        decide_batch: Callable[[List], Awaitable[Sequence]],
+        max_batch: int = 256,
+        max_delay: float = 0.005,
+        max_pending: int = 1024
+    ):
+        """
+        Args:
+            input_model: Model each line is parsed into (DecisionInput)
+            decide_batch: Coroutine deciding a list of inputs, returning per input,
+                in order, an output model or, for a failed input, the exception
+                (or None)
+            max_batch: Most inputs decided in one batch
+            max_delay: Seconds to wait for a batch to fill after its first input
+            max_pending: Most parsed inputs queued per connection
+        """
+        self.input_model = input_model
+        self.decide_batch = decide_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        self.connections = 0
+        self.open_connections = 0
+        self.inputs = 0
+        self.outputs = 0
+        self.errors = 0
+        self.batches = 0
+        self.reader_waits = 0
+
+    async def start(self, host: str, port: int) -> None:
+        """Start accepting connections"""
+        self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE_BYTES)
+
+    async def stop(self) -> None:
+        """Stop accepting connections"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read(self, reader: asyncio.StreamReader, queue: asyncio.Queue) -> None:
+        """Parse input lines into the queue; None marks the end of the stream"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = self.input_model.parse_raw(line)
+                except Exception as e:
+                    item = ValueError(f"Invalid input: {e}")
+                if queue.full():
+                    self.reader_waits += 1
+                await queue.put(item)
+        except (ValueError, ConnectionError) as e:
+            # Over-long line or connection reset
+            logger.warning(f"Decision stream input closed: {e}")
+        await queue.put(None)
+
+    async def _next_batch(self, queue: asyncio.Queue) -> List:
+        """Up to max_batch queued items, waiting max_delay for more after the first; None ends the list"""
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            if queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(queue.get_nowait())
+        return batch
+
+    async def _decide(self, items: List) -> List[bytes]:
+        """Output lines for a batch of parsed inputs and parse errors, in order"""
+        inputs = [item for item in items if not isinstance(item, Exception)]
+        try:
+            outputs = iter(await self.decide_batch(inputs) if inputs else ())
+        except Exception as e:
+            # Not caused by one input: every parsed input of the batch gets the error
+            logger.error(f"Error deciding a stream batch of {len(inputs)}: {e}")
+            outputs = iter([e] * len(inputs))
+        lines = []
+        for item in items:
+            output = item if isinstance(item, Exception) else next(outputs)
+            if output is None or isinstance(output, Exception):
+                self.errors += 1
+                error = str(output) if output is not None else "Decision failed"
+                lines.append(json.dumps({"error": error}).encode() + b"\n")
+            else:
+                lines.append(output.json().encode() + b"\n")
+        return lines
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.open_connections += 1
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        read_task = asyncio.create_task(self._read(reader, queue))
+        try:
+            done = False
+            while not done:
+                items = await self._next_batch(queue)
+                if items[-1] is None:
+                    items.pop()
+                    done = True
+                if not items:
+                    continue
+                self.inputs += len(items)
+                self.batches += 1
+                lines = await self._decide(items)
+                writer.writelines(lines)
+                self.outputs += len(lines)
+                # Backpressure from a slow reader: don't take more input until it catches up
+                await writer.drain()
+        except ConnectionError as e:
+            logger.warning(f"Decision stream output closed: {e}")
+        finally:
+            read_task.cancel()
+            self.open_connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def stats(self) -> Dict[str, object]:
+        """Connection and throughput counters"""
+        return {
+            "listening": self._server is not None,
+            "connections": self.connections,
+            "open_connections": self.open_connections,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.inputs / self.batches if self.batches else 0.0,
+            "reader_waits": self.reader_waits,
+        }
@@ -1,14 +1,85 @@
 from uagents import Agent, Context
 from uagents.setup import fund_agent_if_low
 
-from src.models.decision_models import DecisionInput, DecisionOutput
-from src.decisions.trading import load_grid_prices, decide_energy_distribution, calculate_cost
+from src.models.decision_models import DecisionInput, DecisionOutput, DecisionBatchInput, DecisionBatchOutput
+from src.models.cost_models import CostQuery, CostReport, HouseholdCost
+from src.models.metrics_models import PriceMetrics, TariffMetrics, DecisionCacheMetrics, MPCMetrics, PolicyMetrics, ExecutorMetrics, StreamMetrics
+from src.decisions.trading import (
+    PriceCatalog, PriceTable, price_table_cache, get_grid_prices, decide_energy_distribution, calculate_cost
+)
+from src.decisions.cost_accumulator import CostAccumulator
+from src.decisions.decision_cache import DecisionCache
+from src.decisions.executor import DecisionExecutor
+from src.decisions.fleet import DecisionArrays, DecisionResults, decide_arrays
+from src.decisions.mpc import MPCController
+from src.decisions.policy import PolicyCompiler
+from src.decisions.strategies import build_registry
+from src.agents.decision_stream import DecisionStreamServer
 
+from typing import List, Optional, Union
+import asyncio
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# How often (seconds) to check grid_prices.csv for changes
+PRICE_RELOAD_INTERVAL = float(os.getenv('PRICE_RELOAD_INTERVAL', '30'))
+
+# Per-tariff price files (<tariff_id>.prices or <tariff_id>.csv), loaded on first use
+price_catalog = PriceCatalog(
+    directory=os.getenv('TARIFF_DIR', 'tariffs'),
+    max_tariffs=int(os.getenv('MAX_TARIFFS', '256'))
+)
+
+# Optional memoization of decisions (disabled unless DECISION_CACHE_SIZE > 0)
+DECISION_CACHE_SIZE = int(os.getenv('DECISION_CACHE_SIZE', '0'))
+DECISION_CACHE_OPTIONS = dict(
+    max_entries=DECISION_CACHE_SIZE,
+    energy_resolution=float(os.getenv('DECISION_CACHE_ENERGY_RESOLUTION', '0.001')),
+    price_resolution=float(os.getenv('DECISION_CACHE_PRICE_RESOLUTION', '0.0001'))
+) if DECISION_CACHE_SIZE > 0 else None
+decision_cache = DecisionCache(**DECISION_CACHE_OPTIONS) if DECISION_CACHE_OPTIONS is not None else None
+decide = decision_cache.decide if decision_cache is not None else decide_energy_distribution
+
+# Per-household plans for the "mpc" strategy, re-planned only when reality deviates
+MPC_OPTIONS = dict(
+    tolerance=float(os.getenv('MPC_TOLERANCE', '0.05')),
+    max_households=int(os.getenv('MPC_MAX_HOUSEHOLDS', '10000')),
+    idle_seconds=float(os.getenv('MPC_IDLE_SECONDS', '3600'))
+)
+mpc_controller = MPCController(**MPC_OPTIONS)
+
+# Heuristic compiled into interpolated lookup tables for the "policy" strategy
+POLICY_OPTIONS = dict(
+    max_policies=int(os.getenv('MAX_POLICIES', '16')),
+    capacity_resolution=float(os.getenv('POLICY_CAPACITY_RESOLUTION', '0.5')),
+    max_slots=int(os.getenv('POLICY_MAX_SLOTS', '96'))
+)
+policy_compiler = PolicyCompiler(**POLICY_OPTIONS)
+
+# Strategies requests can pick with DecisionInput.strategy; each declares the
+# price artefacts it reads so they are built once per price version
+strategies = build_registry(heuristic=decide, mpc_controller=mpc_controller, policy_compiler=policy_compiler)
+
+# Decisions run on a thread or process pool so the event loop keeps serving requests;
+# process workers build their own registry with the same options
+decision_executor = DecisionExecutor(
+    strategies,
+    mode=os.getenv('DECISION_EXECUTOR', 'thread'),
+    workers=int(os.getenv('DECISION_WORKERS', '0')) or None,
+    registry_options=dict(decision_cache=DECISION_CACHE_OPTIONS, mpc=MPC_OPTIONS, policy=POLICY_OPTIONS)
+)
+
+# Newline-delimited JSON decisions over long-lived TCP connections (DECISION_STREAM_PORT=0 disables)
+DECISION_STREAM_HOST = os.getenv('DECISION_STREAM_HOST', '127.0.0.1')
+DECISION_STREAM_PORT = int(os.getenv('DECISION_STREAM_PORT', '8001'))
+
+# Running cost totals per household, snapshotted to disk every COST_SNAPSHOT_INTERVAL seconds
+COST_SNAPSHOT_PATH = os.getenv('COST_SNAPSHOT_PATH', 'household_costs.npz')
+COST_SNAPSHOT_INTERVAL = float(os.getenv('COST_SNAPSHOT_INTERVAL', '300'))
+cost_accumulator = CostAccumulator()
+
 
 manager = Agent(
     name="Alice",
@@ -18,6 +89,160 @@ manager = Agent(
 )
 
 
+@manager.on_event("startup")
+async def load_prices_on_startup(ctx: Context):
+    try:
+        await asyncio.to_thread(price_table_cache.refresh)
+        ctx.logger.info(f"Grid prices loaded, active version: {price_table_cache.version}")
+        await asyncio.to_thread(strategies.prepare, get_grid_prices())
+    except Exception as e:
+        ctx.logger.error(f"Error loading grid prices: {str(e)}")
+    try:
+        if await asyncio.to_thread(cost_accumulator.restore, COST_SNAPSHOT_PATH):
+            ctx.logger.info(f"Restored cost totals for {len(cost_accumulator)} household(s)")
+    except Exception as e:
+        ctx.logger.error(f"Error restoring cost totals: {str(e)}")
+    if DECISION_STREAM_PORT:
+        try:
+            await decision_stream.start(DECISION_STREAM_HOST, DECISION_STREAM_PORT)
+            ctx.logger.info(f"Decision stream listening on {DECISION_STREAM_HOST}:{DECISION_STREAM_PORT}")
+        except Exception as e:
+            ctx.logger.error(f"Error starting decision stream: {str(e)}")
+
+
+@manager.on_interval(period=PRICE_RELOAD_INTERVAL)
+async def reload_prices(ctx: Context):
+    # Parse and validate off the event loop; the new table is swapped in atomically
+    try:
+        if await asyncio.to_thread(price_table_cache.refresh):
+            ctx.logger.info(f"Grid prices reloaded, active version: {price_table_cache.version}")
+            await asyncio.to_thread(strategies.prepare, get_grid_prices())
+            policy_compiler.recompile(get_grid_prices())
+        reloaded_tariffs = await asyncio.to_thread(price_catalog.refresh)
+        if reloaded_tariffs:
+            ctx.logger.info(f"Reloaded prices for {reloaded_tariffs} tariff(s)")
+    except Exception as e:
+        ctx.logger.error(f"Error reloading grid prices: {str(e)}")
+
+
+@manager.on_interval(period=COST_SNAPSHOT_INTERVAL)
+async def snapshot_costs(ctx: Context):
+    if not cost_accumulator.dirty:
+        return
+    try:
+        await asyncio.to_thread(cost_accumulator.snapshot, COST_SNAPSHOT_PATH)
+    except Exception as e:
+        ctx.logger.error(f"Error writing cost snapshot: {str(e)}")
+
+
+@manager.on_rest_post("/costs", request=CostQuery, response=CostReport)
+async def handle_costs(ctx: Context, msg: CostQuery) -> CostReport:
+    totals = cost_accumulator.totals(msg.household_ids)
+    households = [
+        HouseholdCost(household_id=household_id, **{**fields, "decisions": int(fields["decisions"])})
+        for household_id, fields in totals.items()
+    ]
+    return CostReport(
+        households=households,
+        total_cost=sum(household.cost for household in households),
+        total_savings=sum(household.savings for household in households)
+    )
+
+
+@manager.on_rest_get("/metrics/prices", PriceMetrics)
+async def handle_price_metrics(ctx: Context) -> PriceMetrics:
+    return PriceMetrics(**price_table_cache.stats())
+
+
+@manager.on_rest_get("/metrics/tariffs", TariffMetrics)
+async def handle_tariff_metrics(ctx: Context) -> TariffMetrics:
+    return TariffMetrics(**price_catalog.stats())
+
+
+@manager.on_rest_get("/metrics/decisions", DecisionCacheMetrics)
+async def handle_decision_cache_metrics(ctx: Context) -> DecisionCacheMetrics:
+    if decision_cache is None:
+        return DecisionCacheMetrics(enabled=False)
+    return DecisionCacheMetrics(enabled=True, **decision_cache.stats())
+
+
+@manager.on_rest_get("/metrics/mpc", MPCMetrics)
+async def handle_mpc_metrics(ctx: Context) -> MPCMetrics:
+    return MPCMetrics(**mpc_controller.stats())
+
+
+@manager.on_rest_get("/metrics/policy", PolicyMetrics)
+async def handle_policy_metrics(ctx: Context) -> PolicyMetrics:
+    return PolicyMetrics(**policy_compiler.stats())
+
+
+@manager.on_rest_get("/metrics/executor", ExecutorMetrics)
+async def handle_executor_metrics(ctx: Context) -> ExecutorMetrics:
+    return ExecutorMetrics(**decision_executor.stats())
+
+
+async def get_tariff_prices(tariff_id: Optional[str]) -> PriceTable:
+    """Active grid prices, or a tariff's prices (loaded off the event loop when first seen)"""
+    if tariff_id is None:
+        return get_grid_prices()
+    grid_prices = price_catalog.peek(tariff_id)
+    if grid_prices is None:
+        grid_prices = await asyncio.to_thread(price_catalog.get, tariff_id)
+    return grid_prices
+
+
+async def decide_and_record(inputs: DecisionArrays) -> DecisionResults:
+    """Decide for many households and add identified households' decisions to their running totals"""
+    # Grouped by tariff and strategy, each group decided and priced in one vectorized pass
+    results = await decide_arrays(inputs, decision_executor, get_tariff_prices)
+    
+    recorded = [
+        row for row, household_id in enumerate(inputs.household_id)
+        if household_id is not None and row not in results.failed
+    ]
+    if recorded:
+        cost_accumulator.record_batch(
+            [inputs.household_id[row] for row in recorded],
+            results.cost[recorded], results.no_battery_cost[recorded],
+            results.buy_from_grid[recorded], results.sell_to_grid[recorded],
+            results.energy_to_storage[recorded], results.take_from_storage[recorded]
+        )
+    return results
+
+
+async def decide_stream_batch(inputs: List[DecisionInput]) -> List[Union[DecisionOutput, ValueError]]:
+    """Decide a micro-batch of streamed inputs; the error of each household that failed"""
+    # Each input is its own row; invalid ones are marked failed without failing the batch
+    results = await decide_and_record(DecisionArrays.from_inputs(inputs))
+    return [
+        ValueError(results.failed[row]) if row in results.failed else DecisionOutput(
+            energy_added_to_storage=energy_to_storage,
+            energy_sold_to_grid=sell_to_grid,
+            energy_bought_from_grid=buy_from_grid,
+            energy_bought_from_storages=take_from_storage
+        )
+        for row, (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage) in enumerate(zip(
+            results.energy_to_storage.tolist(), results.sell_to_grid.tolist(),
+            results.buy_from_grid.tolist(), results.take_from_storage.tolist()
+        ))
+    ]
+
+
+# Streamed inputs are micro-batched into the same path as POST /decisions
+decision_stream = DecisionStreamServer(
+    DecisionInput,
+    decide_stream_batch,
+    max_batch=int(os.getenv('DECISION_STREAM_MAX_BATCH', '256')),
+    max_delay=float(os.getenv('DECISION_STREAM_MAX_DELAY', '0.005')),
+    max_pending=int(os.getenv('DECISION_STREAM_MAX_PENDING', '1024'))
+)
+
+
+@manager.on_rest_get("/metrics/stream", StreamMetrics)
+async def handle_stream_metrics(ctx: Context) -> StreamMetrics:
+    return StreamMetrics(**decision_stream.stats())
+
+
 @manager.on_rest_post("/decision_test", request=DecisionInput, response=DecisionOutput)
 async def handle_decision_test(ctx: Context, msg: DecisionInput) -> DecisionOutput:
     ctx.logger.info(f"Received input data: {msg}")
@@ -60,11 +285,16 @@ async def handle_decision(ctx: Context, msg: DecisionInput) -> DecisionOutput:
         ctx.logger.info(f"Grid buy price: {msg.grid_sale_price} kWh")
         ctx.logger.info(f"P2P price: {msg.p2p_base_price} kWh")
         
-        # Load grid prices
-        grid_prices = load_grid_prices()
+        # Get the active grid prices (kept up to date by reload_prices).
+        # A tariff seen for the first time is loaded off the event loop.
+        grid_prices = await get_tariff_prices(msg.tariff_id)
         
-        # Make comprehensive energy distribution decision
-        energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage = decide_energy_distribution(
+        # Sub-hourly / multi-day price tables are indexed by the request timestamp
+        slot = grid_prices.slot_at(msg.timestamp) if msg.timestamp is not None else None
+        
+        # Make comprehensive energy distribution decision with the requested strategy
+        energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage = await decision_executor.decide(
+            msg.strategy,
             production=msg.production,
             consumption=msg.consumption,
             current_storage=total_current_level,
@@ -73,7 +303,11 @@ async def handle_decision(ctx: Context, msg: DecisionInput) -> DecisionOutput:
             hour=msg.hour,
             p2p_price=msg.p2p_base_price,
             look_ahead_hours=24,
-            enable_proactive_buying=True
+            enable_proactive_buying=True,
+            production_forecast=msg.production_forecast,
+            consumption_forecast=msg.consumption_forecast,
+            household_id=msg.household_id,
+            slot=slot
         )
         
         # Calculate the cost/profit of the decision
@@ -84,9 +318,29 @@ async def handle_decision(ctx: Context, msg: DecisionInput) -> DecisionOutput:
             take_from_storage=take_from_storage,
             grid_prices=grid_prices,
             hour=msg.hour,
-            p2p_price=msg.p2p_base_price
+            p2p_price=msg.p2p_base_price,
+            slot=slot
         )
         
+        # Add the decision to the household's running totals, next to what the
+        # net load would have cost without a battery
+        if msg.household_id is not None:
+            net_load = msg.consumption - msg.production
+            no_battery_cost = calculate_cost(
+                buy_from_grid=max(0.0, net_load),
+                sell_to_grid=max(0.0, -net_load),
+                sell_to_p2p=0.0,
+                take_from_storage=0.0,
+                grid_prices=grid_prices,
+                hour=msg.hour,
+                p2p_price=msg.p2p_base_price,
+                slot=slot
+            )
+            cost_accumulator.record(
+                msg.household_id, cost, no_battery_cost,
+                buy_from_grid, sell_to_grid, energy_to_storage, take_from_storage
+            )
+        
         # Log the decision details
         ctx.logger.info(
             f"Decision made: "
@@ -94,7 +348,8 @@ async def handle_decision(ctx: Context, msg: DecisionInput) -> DecisionOutput:
             f"Sell Grid: {sell_to_grid:.2f} kWh, "
             f"Buy Grid: {buy_from_grid:.2f} kWh, "
             f"Use Storage: {take_from_storage:.2f} kWh, "
-            f"Net Cost: {cost:.2f}"
+            f"Net Cost: {cost:.2f}, "
+            f"Prices: {grid_prices.version}"
         )
         
         # Return the decision
@@ -119,6 +374,80 @@ async def handle_decision(ctx: Context, msg: DecisionInput) -> DecisionOutput:
         )
     
 
+@manager.on_rest_post("/decisions", request=DecisionBatchInput, response=DecisionBatchOutput)
+async def handle_decisions(ctx: Context, msg: DecisionBatchInput) -> DecisionBatchOutput:
+    """
+    Handler for decisions for many households in one request
+    
+    Args:
+        ctx: Agent context
+        msg: Either a list of DecisionInputs or the same inputs as columns
+        
+    Returns:
+        DecisionBatchOutput: Decisions in the same order, as outputs or as columns
+    """
+    if (msg.inputs is None) == (msg.columns is None):
+        ctx.logger.error("A decision batch needs exactly one of inputs or columns")
+        return DecisionBatchOutput(outputs=[])
+    
+    # Invalid households are marked failed; only columns of different lengths reject the batch
+    try:
+        if msg.inputs is not None:
+            inputs = DecisionArrays.from_inputs(msg.inputs)
+        else:
+            columns = msg.columns
+            inputs = DecisionArrays.from_columns(
+                hour=columns.hour,
+                production=columns.production,
+                consumption=columns.consumption,
+                current_storage=columns.storage_level,
+                max_storage=columns.storage_capacity,
+                p2p_price=columns.p2p_base_price,
+                timestamp=columns.timestamp,
+                tariff_id=columns.tariff_id,
+                strategy=[columns.strategy] * len(columns.hour),
+                household_id=columns.household_id
+            )
+    except Exception as e:
+        ctx.logger.error(f"Invalid decision batch: {str(e)}")
+        return DecisionBatchOutput(outputs=[]) if msg.inputs is not None else DecisionBatchOutput(
+            energy_added_to_storage=[], energy_sold_to_grid=[],
+            energy_bought_from_storages=[], energy_bought_from_grid=[]
+        )
+    
+    results = await decide_and_record(inputs)
+    
+    ctx.logger.info(
+        f"Decided for {len(inputs)} household(s), {len(results.failed)} failed, "
+        f"net cost: {results.cost.sum():.2f}"
+    )
+    
+    failed = sorted(results.failed)
+    if msg.inputs is not None:
+        return DecisionBatchOutput(
+            outputs=[
+                DecisionOutput(
+                    energy_added_to_storage=energy_to_storage,
+                    energy_sold_to_grid=sell_to_grid,
+                    energy_bought_from_grid=buy_from_grid,
+                    energy_bought_from_storages=take_from_storage
+                )
+                for energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage in zip(
+                    results.energy_to_storage.tolist(), results.sell_to_grid.tolist(),
+                    results.buy_from_grid.tolist(), results.take_from_storage.tolist()
+                )
+            ],
+            failed=failed
+        )
+    return DecisionBatchOutput(
+        energy_added_to_storage=results.energy_to_storage.tolist(),
+        energy_sold_to_grid=results.sell_to_grid.tolist(),
+        energy_bought_from_storages=results.take_from_storage.tolist(),
+        energy_bought_from_grid=results.buy_from_grid.tolist(),
+        failed=failed
+    )
+
+
 if __name__ == "__main__":
     fund_agent_if_low(manager.wallet.address())
     manager.run()
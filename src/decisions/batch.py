@@ -0,0 +1,223 @@
+from typing import Optional, Tuple, Union
+import numpy as np
+
+from src.decisions.trading import PriceTable, as_price_table
+
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def calculate_proactive_buying_batch(
+    current_storage: ArrayLike,
+    max_storage: ArrayLike,
+    grid_prices: PriceTable,
+    slot: ArrayLike,
+    current_to_storage: ArrayLike,
+    look_ahead_hours: int = 24
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized calculate_proactive_buying for many households.
+
+    The price-dependent factors (next spike, time and price factors) are read
+    from the table's precomputed spike context for each household's slot; only
+    the storage terms are evaluated per household. The early returns of the
+    scalar function become masks.
+
+    Args:
+        current_storage: Current energy in storage (kWh)
+        max_storage: Maximum storage capacity (kWh)
+        grid_prices: PriceTable containing grid prices
+        slot: Price slot of each household
+        current_to_storage: Energy already allocated to storage (kWh)
+        look_ahead_hours: Number of hours to look ahead for price spikes
+
+    Returns:
+        Tuple of arrays:
+        - extra_grid_buy: Additional energy to buy from grid (kWh)
+        - extra_to_storage: Additional energy to store (kWh)
+    """
+    prices = as_price_table(grid_prices)
+    spike_context = prices.spike_context(look_ahead_hours)
+    slots = np.asarray(slot, dtype=np.int64)
+
+    # Calculate available storage space (considering what's already being stored)
+    available_storage = (
+        np.asarray(max_storage, dtype=np.float64)
+        - np.asarray(current_storage, dtype=np.float64)
+        - np.asarray(current_to_storage, dtype=np.float64)
+    )
+
+    # Scale based on storage capacity, then cap at the available storage and at
+    # 50% of it in one go
+    capacity_factor = np.minimum(1.0, available_storage / 20.0)
+    extra_energy = np.minimum(spike_context.proactive_amount[slots] * capacity_factor, available_storage)
+    extra_energy = np.minimum(extra_energy, available_storage * 0.5)
+
+    # Only buy when prices allow it and storage is not (nearly) full
+    should_buy = spike_context.proactive_slot[slots] & ~(available_storage < 1.0)
+    extra_energy = np.where(should_buy, extra_energy, 0.0)
+    return extra_energy, extra_energy
+
+
+def decide_energy_distribution_batch(
+    production: ArrayLike,
+    consumption: ArrayLike,
+    current_storage: ArrayLike,
+    max_storage: ArrayLike,
+    grid_prices: PriceTable,
+    hour: ArrayLike,
+    p2p_price: ArrayLike,
+    look_ahead_hours: int = 24,
+    enable_proactive_buying: bool = True,
+    slot: Optional[ArrayLike] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized decide_energy_distribution over arrays of households.
+
+    Inputs are broadcast against each other, so any of them may be a scalar
+    shared by all households. The surplus, deficit and proactive buying branches
+    of the scalar function are evaluated with masked array operations and give
+    the same results element for element.
+
+    Args:
+        production: Energy produced in the current hour (kWh)
+        consumption: Energy consumed in the current hour (kWh)
+        current_storage: Current energy in storage (kWh)
+        max_storage: Maximum storage capacity (kWh)
+        grid_prices: PriceTable (or DataFrame) containing grid prices
+        hour: Current hour (0-23)
+        p2p_price: Current peer-to-peer trading price
+        look_ahead_hours: Number of hours to look ahead for price forecasting
+        enable_proactive_buying: Flag to enable proactive buying before price spikes
+        slot: Price slots to decide for; overrides hour
+
+    Returns:
+        Tuple of arrays:
+        - energy_to_storage: Energy to add to storage (kWh)
+        - sell_to_grid: Energy to sell to grid (kWh)
+        - buy_from_grid: Energy to buy from grid (kWh)
+        - take_from_storage: Energy to take from storage (kWh)
+    """
+    prices = as_price_table(grid_prices)
+    slots = prices.slots_for_hours(hour) if slot is None else np.asarray(slot, dtype=np.int64)
+
+    production, consumption, current_storage, max_storage, p2p_price, slots = np.broadcast_arrays(
+        np.asarray(production, dtype=np.float64),
+        np.asarray(consumption, dtype=np.float64),
+        np.asarray(current_storage, dtype=np.float64),
+        np.asarray(max_storage, dtype=np.float64),
+        np.asarray(p2p_price, dtype=np.float64),
+        slots
+    )
+
+    # Current prices and precomputed look-ahead context for every household
+    grid_purchase_price = prices.purchase[slots]
+    grid_sale_price = prices.sale[slots]
+    mean_purchase_price = prices.slot_stats.mean_purchase[slots]
+    purchase_spike_threshold = prices.slot_stats.purchase_spike_threshold[slots]
+
+    spike_context = prices.spike_context(look_ahead_hours)
+    hours_to_next_spike = spike_context.hours_to_next_spike[slots]
+    upcoming_good_sell_hours = spike_context.good_sell_hours[slots]
+
+    # Positive = surplus, negative (or zero) = deficit
+    energy_balance = production - consumption
+    is_surplus = energy_balance > 0
+    is_deficit = ~is_surplus
+
+    # Case 1: We have energy surplus
+    storage_capacity_left = max_storage - current_storage
+    storage_urgency = np.where(hours_to_next_spike < np.inf, np.exp(-0.1 * hours_to_next_spike), 0.1)
+    target_storage_percentage = np.minimum(0.9, 0.5 + storage_urgency)
+    target_storage_level = max_storage * target_storage_percentage
+    storage_deficit = np.maximum(0, target_storage_level - current_storage)
+    is_p2p_price_competitive = p2p_price < grid_sale_price * 0.9
+
+    should_prioritize_storage = (
+        ((storage_deficit > 0) & (hours_to_next_spike < 12)) |
+        is_p2p_price_competitive |
+        ((upcoming_good_sell_hours > 0) & (storage_deficit > 0))
+    )
+    stores_surplus = is_surplus & should_prioritize_storage & (storage_capacity_left > 0)
+    surplus_to_storage = np.minimum(energy_balance, storage_capacity_left)
+    energy_to_storage = np.where(stores_surplus, surplus_to_storage, 0.0)
+    available_surplus = np.where(stores_surplus, energy_balance - surplus_to_storage, energy_balance)
+    sell_to_grid = np.where(is_surplus & (available_surplus > 0), available_surplus, 0.0)
+
+    # Case 2: We have energy deficit
+    energy_needed = -energy_balance
+    is_current_price_spike = grid_purchase_price > purchase_spike_threshold
+    should_use_storage = (
+        is_current_price_spike |
+        (hours_to_next_spike > 6) |
+        (current_storage > 0.8 * max_storage)
+    )
+    uses_storage = is_deficit & should_use_storage & (current_storage > 0)
+    storage_usage_cap = np.where(is_current_price_spike, current_storage, current_storage * 0.5)
+    storage_used = np.minimum(storage_usage_cap, energy_needed)
+    take_from_storage = np.where(uses_storage, storage_used, 0.0)
+    energy_needed = np.where(uses_storage, energy_needed - storage_used, energy_needed)
+
+    buys_from_grid = is_deficit & (energy_needed > 0)
+    buy_from_grid = np.where(buys_from_grid, energy_needed, 0.0)
+
+    # If price is very low and we have upcoming spikes, buy extra for storage
+    is_price_very_low = grid_purchase_price < mean_purchase_price * 0.8
+    storage_space_available = max_storage - current_storage
+    buys_extra = buys_from_grid & is_price_very_low & (hours_to_next_spike < 12) & (storage_space_available > 0)
+    price_advantage_ratio = (mean_purchase_price - grid_purchase_price) / mean_purchase_price
+    extra_buy = np.minimum(storage_space_available, price_advantage_ratio * 10)
+    energy_to_storage = np.where(buys_extra, energy_to_storage + extra_buy, energy_to_storage)
+    buy_from_grid = np.where(buys_extra, buy_from_grid + extra_buy, buy_from_grid)
+
+    # Apply proactive buying strategy if enabled
+    if enable_proactive_buying:
+        extra_grid_buy, extra_storage = calculate_proactive_buying_batch(
+            current_storage,
+            max_storage,
+            prices,
+            slots,
+            energy_to_storage,
+            look_ahead_hours
+        )
+        buy_from_grid = buy_from_grid + extra_grid_buy
+        energy_to_storage = energy_to_storage + extra_storage
+
+    # Ensure we don't have negative values (safety check)
+    return (
+        np.maximum(0, energy_to_storage),
+        np.maximum(0, sell_to_grid),
+        np.maximum(0, buy_from_grid),
+        np.maximum(0, take_from_storage)
+    )
+
+
+def calculate_cost_batch(
+    buy_from_grid: ArrayLike,
+    sell_to_grid: ArrayLike,
+    sell_to_p2p: ArrayLike,
+    take_from_storage: ArrayLike,
+    grid_prices: PriceTable,
+    hour: ArrayLike,
+    p2p_price: ArrayLike,
+    slot: Optional[ArrayLike] = None
+) -> np.ndarray:
+    """
+    Vectorized calculate_cost over arrays of decisions.
+
+    Inputs are broadcast against each other (e.g. households x slots) and give
+    the same results element for element as the scalar function.
+
+    Returns:
+        Array of net cost (positive) or profit (negative)
+    """
+    prices = as_price_table(grid_prices)
+    slots = prices.slots_for_hours(hour) if slot is None else np.asarray(slot, dtype=np.int64)
+
+    # Costs and revenues at each decision's slot prices
+    grid_purchase_cost = np.asarray(buy_from_grid, dtype=np.float64) * prices.purchase[slots]
+    grid_sale_revenue = np.asarray(sell_to_grid, dtype=np.float64) * prices.sale[slots]
+    p2p_sale_revenue = np.asarray(sell_to_p2p, dtype=np.float64) * np.asarray(p2p_price, dtype=np.float64)
+
+    # Net cost (positive = cost, negative = profit)
+    return grid_purchase_cost - grid_sale_revenue - p2p_sale_revenue
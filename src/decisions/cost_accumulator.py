@@ -0,0 +1,165 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columns of the running totals, one row per household
+COST_FIELDS = (
+    "cost",
+    "no_battery_cost",
+    "bought_from_grid",
+    "sold_to_grid",
+    "stored",
+    "taken_from_storage",
+    "decisions",
+)
+
+
+class CostAccumulator:
+    """
+    Running cost totals per household, fed by every decision.
+
+    Totals live in one float64 array with a row per household and a column per
+    COST_FIELDS entry; a dict maps household ids to rows. Recording a decision
+    is a dict lookup plus a row update, O(1) (amortized when the array grows).
+    no_battery_cost is what the household's net load (consumption minus own
+    production) would have cost traded with the grid directly, the "no_battery"
+    baseline of savings.py, so savings are those of the battery strategy:
+    no_battery_cost - cost.
+
+    snapshot() writes the totals to an .npz file (atomically, through a
+    temporary file) and restore() reads them back, so totals survive restarts
+    without replaying logs.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Args:
+            capacity: Initial number of household rows; the store doubles when full
+        """
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._totals = np.zeros((max(1, capacity), len(COST_FIELDS)))
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _row(self, household_id: str) -> int:
+        """Row of a household, adding it if new (lock held)"""
+        row = self._index.get(household_id)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._totals):
+                self._totals = np.concatenate((self._totals, np.zeros_like(self._totals)))
+            self._index[household_id] = row
+            self._ids.append(household_id)
+        return row
+
+    def record(
+        self,
+        household_id: str,
+        cost: float,
+        no_battery_cost: float,
+        buy_from_grid: float,
+        sell_to_grid: float,
+        energy_to_storage: float,
+        take_from_storage: float
+    ) -> None:
+        """
+        Add one decision to a household's totals.
+
+        Args:
+            household_id: Household the decision was made for
+            cost: Net cost of the decision (calculate_cost)
+            no_battery_cost: Net cost of trading the net load with the grid, without storage
+            buy_from_grid: Energy bought from the grid (kWh)
+            sell_to_grid: Energy sold to the grid (kWh)
+            energy_to_storage: Energy added to storage (kWh)
+            take_from_storage: Energy taken from storage (kWh)
+        """
+        with self._lock:
+            row = self._row(household_id)
+            self._totals[row] += (
+                cost, no_battery_cost, buy_from_grid, sell_to_grid, energy_to_storage, take_from_storage, 1.0
+            )
+            self.dirty = True
+
+    def record_batch(
+        self,
+        household_ids: Sequence[str],
+        cost: np.ndarray,
+        no_battery_cost: np.ndarray,
+        buy_from_grid: np.ndarray,
+        sell_to_grid: np.ndarray,
+        energy_to_storage: np.ndarray,
+        take_from_storage: np.ndarray
+    ) -> None:
+        """
+        Add many decisions at once, one entry per decision (see record).
+
+        A household may appear several times; all of its decisions are added.
+        """
+        values = np.column_stack((
+            cost, no_battery_cost, buy_from_grid, sell_to_grid, energy_to_storage, take_from_storage,
+            np.ones(len(household_ids))
+        ))
+        with self._lock:
+            rows = [self._row(household_id) for household_id in household_ids]
+            np.add.at(self._totals, rows, values)
+            self.dirty = True
+
+    def totals(self, household_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Totals per household, for all households or the given ones (unknown ids are skipped).
+
+        Returns:
+            Dict of household id to {field: total} including savings
+        """
+        with self._lock:
+            ids = self._ids if household_ids is None else [i for i in household_ids if i in self._index]
+            rows = self._totals[[self._index[household_id] for household_id in ids]].tolist()
+        result = {}
+        for household_id, row in zip(ids, rows):
+            totals = dict(zip(COST_FIELDS, row))
+            totals["savings"] = totals["no_battery_cost"] - totals["cost"]
+            result[household_id] = totals
+        return result
+
+    def snapshot(self, path: str) -> None:
+        """Write the totals to an .npz file, replacing it atomically"""
+        with self._lock:
+            ids = np.array(self._ids, dtype=str)
+            totals = self._totals[:len(self._ids)].copy()
+            self.dirty = False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, ids=ids, totals=totals, fields=np.array(COST_FIELDS))
+        os.replace(tmp_path, path)
+
+    def restore(self, path: str) -> bool:
+        """Replace the totals with a snapshot; returns False if there is none"""
+        if not os.path.exists(path):
+            return False
+        with np.load(path, allow_pickle=False) as snapshot:
+            if tuple(snapshot["fields"].tolist()) != COST_FIELDS:
+                raise ValueError(f"Cost snapshot {path} has different fields: {snapshot['fields'].tolist()}")
+            ids = snapshot["ids"].tolist()
+            totals = snapshot["totals"]
+        if totals.shape != (len(ids), len(COST_FIELDS)):
+            raise ValueError(
+                f"Cost snapshot {path} has totals of shape {totals.shape} for {len(ids)} household(s)"
+            )
+        with self._lock:
+            self._ids = ids
+            self._index = {household_id: row for row, household_id in enumerate(ids)}
+            self._totals = np.zeros((max(1024, 2 * len(ids)), len(COST_FIELDS)))
+            self._totals[:len(ids)] = totals
+            self.dirty = False
+        logger.info(f"Restored cost totals for {len(ids)} household(s) from {path}")
+        return True
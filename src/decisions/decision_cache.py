@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import threading
+
+from src.decisions.trading import PriceTable, decide_energy_distribution
+
+
+class DecisionCache:
+    """
+    Bounded LRU memoization around decide_energy_distribution.
+
+    decide_energy_distribution is a pure function of the price table and its
+    numeric inputs, so near-identical requests can share one result. Entries are
+    keyed on the price table version plus the inputs quantized to
+    energy_resolution (kWh) and price_resolution. On a miss the decision is
+    computed for the quantized inputs, so a cached result does not depend on
+    which request happened to populate it; a resolution of 0 disables
+    quantization for that kind of input.
+
+    Because the price version is part of the key, a reloaded price table never
+    hits entries computed for the old one; those entries simply age out of the
+    LRU. All bookkeeping happens under a lock, so the cache can be shared by
+    asyncio handlers and worker threads.
+    """
+
+    def __init__(self, max_entries: int = 10000, energy_resolution: float = 0.001, price_resolution: float = 0.0001):
+        self.max_entries = max_entries
+        self.energy_resolution = energy_resolution
+        self.price_resolution = price_resolution
+        self._entries: "OrderedDict[tuple, Tuple[float, float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _quantize(value: float, resolution: float) -> Tuple[float, float]:
+        """Return (key, representative value) for an input at the given resolution"""
+        if resolution <= 0:
+            return value, value
+        step = round(value / resolution)
+        return step, step * resolution
+
+    def decide(
+        self,
+        production: float,
+        consumption: float,
+        current_storage: float,
+        max_storage: float,
+        grid_prices: PriceTable,
+        hour: int,
+        p2p_price: float,
+        look_ahead_hours: int = 24,
+        enable_proactive_buying: bool = True,
+        slot: Optional[int] = None
+    ) -> Tuple[float, float, float, float]:
+        """Cached drop-in for decide_energy_distribution (same arguments and result)"""
+        if slot is None:
+            slot = grid_prices.slot_for_hour(hour)
+
+        production_key, production = self._quantize(production, self.energy_resolution)
+        consumption_key, consumption = self._quantize(consumption, self.energy_resolution)
+        storage_key, current_storage = self._quantize(current_storage, self.energy_resolution)
+        capacity_key, max_storage = self._quantize(max_storage, self.energy_resolution)
+        p2p_key, p2p_price = self._quantize(p2p_price, self.price_resolution)
+        key = (
+            grid_prices.version, slot, production_key, consumption_key, storage_key, capacity_key,
+            p2p_key, look_ahead_hours, enable_proactive_buying
+        )
+
+        with self._lock:
+            decision = self._entries.get(key)
+            if decision is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return decision
+            self.misses += 1
+
+        decision = tuple(decide_energy_distribution(
+            production=production,
+            consumption=consumption,
+            current_storage=current_storage,
+            max_storage=max_storage,
+            grid_prices=grid_prices,
+            hour=hour,
+            p2p_price=p2p_price,
+            look_ahead_hours=look_ahead_hours,
+            enable_proactive_buying=enable_proactive_buying,
+            slot=slot
+        ))
+
+        with self._lock:
+            self._entries[key] = decision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return decision
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from src.decisions.trading import PriceTable, as_price_table
+
+
+@dataclass(frozen=True)
+class StorageSchedule:
+    """
+    Storage schedule over the planning horizon.
+
+    Attributes:
+        slots: Price slot of each step
+        charge: Energy into storage per step (kWh, negative = discharge)
+        grid: Net grid energy per step (kWh, positive = buy, negative = sell)
+        cost: Expected grid cost of the schedule, before the terminal storage value
+    """
+    slots: np.ndarray
+    charge: np.ndarray
+    grid: np.ndarray
+    cost: float
+
+
+def forecast_series(values: Optional[Sequence[float]], current: float, horizon: int) -> np.ndarray:
+    """Per-step forecast; the first step is the current value and a short forecast repeats its last value"""
+    if values is None or len(values) == 0:
+        return np.full(horizon, float(current))
+    forecast = np.asarray(values, dtype=np.float64)[:horizon]
+    forecast = np.concatenate((forecast, np.full(horizon - len(forecast), forecast[-1])))
+    forecast[0] = current
+    return forecast
+
+
+def slot_decision(charge: float, grid: float) -> Tuple[float, float, float, float]:
+    """
+    A planned slot as a decide_energy_distribution result.
+
+    Args:
+        charge: Energy into storage in the slot (kWh), negative to discharge
+        grid: Energy from the grid in the slot (kWh), negative to sell
+
+    Returns:
+        Tuple of (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage)
+    """
+    return max(0.0, charge), max(0.0, -grid), max(0.0, grid), max(0.0, -charge)
+
+
+def horizon_slots(prices: PriceTable, slot: int, look_ahead_hours: int) -> np.ndarray:
+    """Slots covered by the planning horizon, starting at the current slot"""
+    steps = np.arange(max(1, int(look_ahead_hours) * prices.slots_per_hour))
+    if prices.is_series:
+        return (slot + steps)[slot + steps < len(prices)]
+    return (slot + steps) % len(prices)
+
+
+def _stage_cost(load, purchase, sale, charge) -> np.ndarray:
+    """Grid cost of charging `charge` kWh on top of the net load (negative grid energy is sold)"""
+    grid = load + charge
+    return np.where(grid > 0, grid * purchase, grid * sale)
+
+
+def solve_storage_schedule(
+    production: float,
+    consumption: float,
+    current_storage: float,
+    max_storage: float,
+    grid_prices: PriceTable,
+    hour: int,
+    look_ahead_hours: int = 24,
+    production_forecast: Optional[Sequence[float]] = None,
+    consumption_forecast: Optional[Sequence[float]] = None,
+    levels: int = 1000,
+    max_rate: Optional[float] = None,
+    terminal_price: Optional[float] = None,
+    slot: Optional[int] = None
+) -> StorageSchedule:
+    """
+    Solve the storage schedule over the look-ahead horizon by dynamic programming.
+
+    The state of charge is discretized into `levels` steps between empty and
+    max_storage. Each step's grid cost is convex in the charge as long as the
+    sale price does not exceed the purchase price (sale prices are capped at the
+    purchase price to guarantee this), so the value functions stay convex and
+    each backward step is a min-plus convolution of two convex sequences. That
+    convolution is computed over the whole SoC grid at once by merging sorted
+    slopes, O(levels log levels) per step instead of O(levels^2).
+
+    Args:
+        production: Energy produced in the current slot (kWh)
+        consumption: Energy consumed in the current slot (kWh)
+        current_storage: Current energy in storage (kWh)
+        max_storage: Maximum storage capacity (kWh)
+        grid_prices: PriceTable (or DataFrame) containing grid prices
+        hour: Current hour (0-23)
+        look_ahead_hours: Planning horizon in hours
+        production_forecast: Expected production per slot from the current slot
+            on (kWh); defaults to the current production
+        consumption_forecast: Expected consumption per slot from the current
+            slot on (kWh); defaults to the current consumption
+        levels: Number of discrete state-of-charge levels
+        max_rate: Maximum energy into or out of storage per slot (kWh), unlimited if None
+        terminal_price: Value per kWh left in storage at the end of the horizon;
+            defaults to the mean grid sale price
+        slot: Price slot to start from; overrides hour
+
+    Returns:
+        StorageSchedule: Charge and grid energy per slot over the horizon
+    """
+    prices = as_price_table(grid_prices)
+    if slot is None:
+        slot = prices.slot_for_hour(hour)
+    slots = horizon_slots(prices, slot, look_ahead_hours)
+    horizon = len(slots)
+
+    purchase = prices.purchase[slots]
+    # Selling above the purchase price would make the stage cost non-convex
+    sale = prices.artefact("capped_sale")[slots]
+    load = (
+        forecast_series(consumption_forecast, consumption, horizon)
+        - forecast_series(production_forecast, production, horizon)
+    )
+
+    # No storage: the grid covers the net load
+    if max_storage <= 0 or levels < 2:
+        return StorageSchedule(slots, np.zeros(horizon), load, float(np.sum(_stage_cost(load, purchase, sale, 0.0))))
+
+    level_size = max_storage / (levels - 1)
+    level_energy = np.arange(levels) * level_size
+    reach = levels - 1 if max_rate is None else min(levels - 1, int(max_rate // level_size))
+    discharge_levels = np.arange(-reach, reach + 1)  # k = level now - level next
+
+    if terminal_price is None:
+        terminal_price = prices.stats.mean_sale
+
+    # Backward pass: values[t][s] = cheapest cost from step t on, starting at level s
+    values: List[Optional[np.ndarray]] = [None] * (horizon + 1)
+    values[horizon] = -terminal_price * level_energy
+    for t in range(horizon - 1, 0, -1):
+        next_values = values[t + 1]
+        step_cost = _stage_cost(load[t], purchase[t], sale[t], -discharge_levels * level_size)
+
+        # values[t](s) = min over k of step_cost(k) + next_values(s - k): the
+        # min-plus convolution of two convex sequences, whose slopes are the
+        # merged slopes of both
+        slopes = np.sort(np.concatenate((np.diff(next_values), np.diff(step_cost))))
+        convolution = next_values[0] + step_cost[0] + np.concatenate(([0.0], np.cumsum(slopes)))
+        values[t] = convolution[reach:reach + levels]
+
+    # Forward pass from the exact current storage; later steps start on the grid
+    charge = np.empty(horizon)
+    storage = min(max(float(current_storage), 0.0), max_storage)
+    level = int(round(storage / level_size))
+    for t in range(horizon):
+        low, high = max(0, level - reach), min(levels - 1, level + reach)
+        step_charge = level_energy[low:high + 1] - storage
+        total = _stage_cost(load[t], purchase[t], sale[t], step_charge) + values[t + 1][low:high + 1]
+        best = int(np.argmin(total))
+        charge[t] = step_charge[best]
+        level = low + best
+        storage = level_energy[level]
+
+    grid = load + charge
+    return StorageSchedule(slots, charge, grid, float(np.sum(_stage_cost(load, purchase, sale, charge))))
+
+
+def decide_energy_distribution_dp(
+    production: float,
+    consumption: float,
+    current_storage: float,
+    max_storage: float,
+    grid_prices: PriceTable,
+    hour: int,
+    p2p_price: float,
+    look_ahead_hours: int = 24,
+    production_forecast: Optional[Sequence[float]] = None,
+    consumption_forecast: Optional[Sequence[float]] = None,
+    levels: int = 1000,
+    max_rate: Optional[float] = None,
+    slot: Optional[int] = None
+) -> Tuple[float, float, float, float]:
+    """
+    Decide the current slot's energy distribution from the DP storage schedule.
+
+    Takes decide_energy_distribution's arguments plus forecasts, the number of
+    state-of-charge levels (more levels plan closer to the exact optimum but
+    cost proportionally more) and a rate limit. The plan trades with the grid
+    only, so p2p_price is unused.
+
+    Returns:
+        Tuple of:
+        - energy_to_storage: Energy to add to storage (kWh)
+        - sell_to_grid: Energy to sell to grid (kWh)
+        - buy_from_grid: Energy to buy from grid (kWh)
+        - take_from_storage: Energy to take from storage (kWh)
+    """
+    schedule = solve_storage_schedule(
+        production=production,
+        consumption=consumption,
+        current_storage=current_storage,
+        max_storage=max_storage,
+        grid_prices=grid_prices,
+        hour=hour,
+        look_ahead_hours=look_ahead_hours,
+        production_forecast=production_forecast,
+        consumption_forecast=consumption_forecast,
+        levels=levels,
+        max_rate=max_rate,
+        slot=slot
+    )
+    return slot_decision(float(schedule.charge[0]), float(schedule.grid[0]))
@@ -0,0 +1,233 @@
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.decisions.strategies import StrategyRegistry, build_registry_from_options
+from src.decisions.trading import PriceTable
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+# Price tables a worker process keeps, most recently used last
+_WORKER_TABLES = 16
+_worker_tables: "OrderedDict[str, PriceTable]" = OrderedDict()
+_worker_registry: Optional[StrategyRegistry] = None
+
+
+class MissingPrices(Exception):
+    """A worker process does not have the price table a task refers to"""
+
+
+def _remember_table(table: PriceTable) -> None:
+    _worker_tables[table.version] = table
+    _worker_tables.move_to_end(table.version)
+    while len(_worker_tables) > _WORKER_TABLES:
+        _worker_tables.popitem(last=False)
+
+
+def _init_worker(tables: Tuple[PriceTable, ...], registry_options: dict) -> None:
+    """Process pool initializer: receive the current price tables once and build the strategies"""
+    global _worker_registry
+    _worker_registry = build_registry_from_options(**registry_options)
+    for table in tables:
+        _remember_table(table)
+        _worker_registry.prepare(table)
+
+
+def _decide_in_worker(
+    method: str, strategy: Optional[str], version: str, table: Optional[PriceTable], kwargs: dict
+):
+    """Call a registry method in a worker process with a price table it already holds (or is sent once)"""
+    if table is not None:
+        _remember_table(table)
+    prices = _worker_tables.get(version)
+    if prices is None:
+        raise MissingPrices(version)
+    _worker_tables.move_to_end(version)
+    return getattr(_worker_registry, method)(strategy, prices, **kwargs)
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    """Run fn and return its result with the start and end times (monotonic clock)"""
+    started = time.monotonic()
+    result = fn(*args, **kwargs)
+    return result, started, time.monotonic()
+
+
+class DecisionExecutor:
+    """
+    Runs decisions off the event loop on a thread or process pool.
+
+    In "thread" mode decisions run on a thread pool against the agent's own
+    strategy registry, so stateful strategies (decision cache, MPC plans) are
+    shared as before. NumPy releases the GIL in the heavy parts, and the event
+    loop keeps serving other requests meanwhile.
+
+    In "process" mode each worker process builds its own strategy registry
+    from registry_options (the same cache, MPC and policy settings as the
+    agent's registry) and keeps the price tables it has been given, keyed by
+    version. The pool starts with the first decision, and the table that
+    decision uses is shipped to every worker once through the pool initializer. A task only carries the version;
+    the table is attached (once per worker) only when a worker reports that it
+    does not have it yet, e.g. after a price reload or for another tariff.
+    Stateful strategies then keep separate state per worker.
+
+    "inline" runs decisions on the event loop, as the handler used to.
+
+    Each task (one decision, or one batch of them) records its queue wait
+    (submitted until a worker starts it) and compute time.
+    """
+
+    def __init__(
+        self,
+        registry: StrategyRegistry,
+        mode: str = "thread",
+        workers: Optional[int] = None,
+        registry_options: Optional[Dict[str, Optional[dict]]] = None
+    ):
+        """
+        Args:
+            registry: Strategies used in "inline" and "thread" mode
+            mode: "inline", "thread" or "process"
+            workers: Pool size, defaults to the number of CPUs
+            registry_options: Arguments of build_registry_from_options each worker
+                process builds its strategies with; should match registry
+        """
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode: {mode} (expected one of {', '.join(EXECUTOR_MODES)})")
+        self.registry = registry
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.registry_options = registry_options or {}
+        self._pool: Optional[Executor] = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decision")
+        self._lock = threading.Lock()
+        # Times each price version was attached to a task (process mode)
+        self._sent: "OrderedDict[str, int]" = OrderedDict()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.tables_sent = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_compute_seconds = 0.0
+        self.max_compute_seconds = 0.0
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        if self._pool is None:
+            return _timed(fn, *args, **kwargs), submitted
+        return await loop.run_in_executor(self._pool, partial(_timed, fn, *args, **kwargs)), submitted
+
+    async def _submit(self, method: str, strategy: Optional[str], grid_prices: PriceTable, kwargs: dict):
+        """Run a StrategyRegistry method on the pool, recording queue wait and compute time"""
+        with self._lock:
+            self.submitted += 1
+            if self.mode == "process" and self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker,
+                    initargs=((grid_prices,), self.registry_options)
+                )
+                self._sent[grid_prices.version] = self.workers
+            # Attach a new table to the first tasks that use it, about one per
+            # worker, so a burst after a reload does not all miss at once
+            attach = self.mode == "process" and self._sent.get(grid_prices.version, 0) < self.workers
+            if attach:
+                self._sent[grid_prices.version] = self._sent.get(grid_prices.version, 0) + 1
+                self.tables_sent += 1
+                while len(self._sent) > _WORKER_TABLES:
+                    self._sent.popitem(last=False)
+        try:
+            if self.mode == "process":
+                try:
+                    (result, started, finished), submitted = await self._run(
+                        _decide_in_worker, method, strategy, grid_prices.version,
+                        grid_prices if attach else None, kwargs
+                    )
+                except MissingPrices:
+                    with self._lock:
+                        self.tables_sent += 1
+                    (result, started, finished), submitted = await self._run(
+                        _decide_in_worker, method, strategy, grid_prices.version, grid_prices, kwargs
+                    )
+            else:
+                (result, started, finished), submitted = await self._run(
+                    getattr(self.registry, method), strategy, grid_prices, **kwargs
+                )
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+
+        queue_seconds = max(0.0, started - submitted)
+        compute_seconds = finished - started
+        with self._lock:
+            self.completed += 1
+            self.total_queue_seconds += queue_seconds
+            self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+            self.total_compute_seconds += compute_seconds
+            self.max_compute_seconds = max(self.max_compute_seconds, compute_seconds)
+        return result
+
+    async def decide(self, strategy: Optional[str], grid_prices: PriceTable, **kwargs) -> Tuple[float, float, float, float]:
+        """
+        Decide with a registered strategy on the pool.
+
+        Args:
+            strategy: Strategy name, None for the default
+            grid_prices: PriceTable containing grid prices
+            **kwargs: Arguments for StrategyRegistry.decide
+
+        Returns:
+            Tuple of (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage)
+        """
+        return await self._submit("decide", strategy, grid_prices, kwargs)
+
+    async def decide_batch(
+        self, strategy: Optional[str], grid_prices: PriceTable, **kwargs
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[int, str]]:
+        """
+        Decide for many households with a registered strategy as one task on the pool.
+
+        Args:
+            strategy: Strategy name, None for the default
+            grid_prices: PriceTable containing grid prices
+            **kwargs: Arguments for StrategyRegistry.decide_batch
+
+        Returns:
+            Tuple of arrays (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage)
+            and the households (by position) whose decision failed, with the error
+        """
+        return await self._submit("decide_batch", strategy, grid_prices, kwargs)
+
+    def shutdown(self) -> None:
+        """Stop the pool without waiting for queued decisions"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, object]:
+        """Pool configuration, counters and queue wait vs compute time"""
+        with self._lock:
+            completed = max(self.completed, 1)
+            return {
+                "mode": self.mode,
+                "workers": 0 if self.mode == "inline" else self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.submitted - self.completed - self.failed,
+                "tables_sent": self.tables_sent,
+                "mean_queue_ms": self.total_queue_seconds / completed * 1e3,
+                "max_queue_ms": self.max_queue_seconds * 1e3,
+                "mean_compute_ms": self.total_compute_seconds / completed * 1e3,
+                "max_compute_ms": self.max_compute_seconds * 1e3,
+            }
@@ -0,0 +1,304 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+
+import numpy as np
+
+from src.decisions.batch import calculate_cost_batch
+from src.decisions.executor import DecisionExecutor
+from src.decisions.trading import PriceTable
+
+logger = logging.getLogger(__name__)
+
+
+def _storage_totals(storage_levels: dict) -> Tuple[float, float]:
+    """Current level and capacity of all of a household's storages (kWh)"""
+    current_storage = max_storage = 0.0
+    for storage in storage_levels.values():
+        current_storage += float(storage['current_level'])
+        max_storage += float(storage['capacity'])
+    return current_storage, max_storage
+
+
+def _column(values: Optional[Sequence], n: int) -> list:
+    """A per-household column, all None when not given"""
+    if values is None:
+        return [None] * n
+    if len(values) != n:
+        raise ValueError(f"Expected {n} values per column, got {len(values)}")
+    return list(values)
+
+
+@dataclass(frozen=True)
+class DecisionArrays:
+    """
+    Decision inputs of many households, one entry per household.
+
+    Attributes:
+        hour: Current hour
+        production: Energy produced (kWh)
+        consumption: Energy consumed (kWh)
+        current_storage: Energy in all storages (kWh)
+        max_storage: Capacity of all storages (kWh)
+        p2p_price: Peer-to-peer price
+        timestamp: Time selecting the price slot, None to use the hour
+        tariff_id: Tariff price file, None for grid_prices.csv
+        strategy: Strategy name, None for the default
+        household_id: Household id, None for anonymous requests
+        production_forecast: Production forecast (kWh per slot) or None
+        consumption_forecast: Consumption forecast (kWh per slot) or None
+        failed: Rows that could not be read, with the error; they are not
+            decided, and their non-finite inputs are 0
+    """
+    hour: np.ndarray
+    production: np.ndarray
+    consumption: np.ndarray
+    current_storage: np.ndarray
+    max_storage: np.ndarray
+    p2p_price: np.ndarray
+    timestamp: List[Optional[datetime]]
+    tariff_id: List[Optional[str]]
+    strategy: List[Optional[str]]
+    household_id: List[Optional[str]]
+    production_forecast: List[Optional[List[float]]]
+    consumption_forecast: List[Optional[List[float]]]
+    failed: Dict[int, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.production)
+
+    @classmethod
+    def from_columns(
+        cls,
+        hour: Sequence[int],
+        production: Sequence[float],
+        consumption: Sequence[float],
+        current_storage: Sequence[float],
+        max_storage: Sequence[float],
+        p2p_price: Sequence[float],
+        timestamp: Optional[Sequence[Optional[datetime]]] = None,
+        tariff_id: Optional[Sequence[Optional[str]]] = None,
+        strategy: Optional[Sequence[Optional[str]]] = None,
+        household_id: Optional[Sequence[Optional[str]]] = None,
+        production_forecast: Optional[Sequence[Optional[List[float]]]] = None,
+        consumption_forecast: Optional[Sequence[Optional[List[float]]]] = None,
+        failed: Optional[Dict[int, str]] = None
+    ) -> "DecisionArrays":
+        """
+        Build from columns of equal length; optional columns default to None for every household.
+
+        Columns of different lengths reject the whole batch. A row with a
+        non-finite number (or listed in failed) is only marked failed.
+        """
+        numeric = [
+            np.asarray(values, dtype=np.float64)
+            for values in (production, consumption, current_storage, max_storage, p2p_price)
+        ]
+        hour = np.asarray(hour, dtype=np.int64)
+        n = len(hour)
+        if any(values.shape != (n,) for values in numeric):
+            raise ValueError(f"Expected {n} values per column")
+
+        failed = dict(failed or {})
+        finite = np.isfinite(numeric)
+        if not finite.all():
+            for row in np.flatnonzero(~finite.all(axis=0)).tolist():
+                failed.setdefault(row, "Inputs must be finite numbers")
+            numeric = [np.where(ok, values, 0.0) for ok, values in zip(finite, numeric)]
+        return cls(
+            hour, *numeric,
+            *(_column(values, n) for values in (
+                timestamp, tariff_id, strategy, household_id, production_forecast, consumption_forecast
+            )),
+            failed=failed
+        )
+
+    @classmethod
+    def from_inputs(cls, inputs: Sequence) -> "DecisionArrays":
+        """Build from DecisionInput messages, totalling each household's storages; bad storage levels fail only their row"""
+        storages = np.zeros((len(inputs), 2))
+        failed: Dict[int, str] = {}
+        for row, msg in enumerate(inputs):
+            try:
+                storages[row] = _storage_totals(msg.storage_levels)
+            except Exception as e:
+                failed[row] = f"Invalid storage_levels: {e!r}"
+        return cls.from_columns(
+            hour=[msg.hour for msg in inputs],
+            production=[msg.production for msg in inputs],
+            consumption=[msg.consumption for msg in inputs],
+            current_storage=storages[:, 0],
+            max_storage=storages[:, 1],
+            p2p_price=[msg.p2p_base_price for msg in inputs],
+            timestamp=[msg.timestamp for msg in inputs],
+            tariff_id=[msg.tariff_id for msg in inputs],
+            strategy=[msg.strategy for msg in inputs],
+            household_id=[msg.household_id for msg in inputs],
+            production_forecast=[msg.production_forecast for msg in inputs],
+            consumption_forecast=[msg.consumption_forecast for msg in inputs],
+            failed=failed
+        )
+
+
+@dataclass(frozen=True)
+class DecisionResults:
+    """
+    Decisions and their costs for a DecisionArrays, one entry per household.
+
+    Households that failed (invalid inputs, unknown tariff or strategy, time
+    outside the price series, an error in their strategy, ...) get the fallback
+    decision of the single-decision handler (buy all consumption from the grid,
+    zero costs) and are listed in failed with the error message. A failure
+    only affects its own household, except a tariff or strategy that cannot be
+    loaded, which fails the households using it.
+    """
+    energy_to_storage: np.ndarray
+    sell_to_grid: np.ndarray
+    buy_from_grid: np.ndarray
+    take_from_storage: np.ndarray
+    cost: np.ndarray
+    no_battery_cost: np.ndarray
+    failed: Dict[int, str] = field(default_factory=dict)
+
+
+def _groups(inputs: DecisionArrays) -> Dict[Tuple[Optional[str], Optional[str]], np.ndarray]:
+    """Rows (other than failed ones) by (tariff_id, strategy); the usual single group is found without a Python loop per row"""
+    keys = list(zip(inputs.tariff_id, inputs.strategy))
+    if not inputs.failed and keys.count(keys[0]) == len(keys):
+        return {keys[0]: np.arange(len(keys))}
+    groups: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+    for row, key in enumerate(keys):
+        if row not in inputs.failed:
+            groups.setdefault(key, []).append(row)
+    return {key: np.array(rows) for key, rows in groups.items()}
+
+
+def _slots(prices: PriceTable, inputs: DecisionArrays, rows: np.ndarray) -> Tuple[np.ndarray, Dict[int, str]]:
+    """
+    Price slot of each row: from its timestamp if it has one, otherwise from its hour.
+
+    Returns:
+        Tuple of (slots, errors): errors maps the rows whose hour or timestamp
+        lies outside the prices to the message; their slot is 0
+    """
+    slots = np.zeros(len(rows), dtype=np.int64)
+    errors: Dict[int, str] = {}
+    timed = np.array([inputs.timestamp[row] is not None for row in rows.tolist()], dtype=bool)
+    hourly = np.flatnonzero(~timed)
+    if len(hourly):
+        hours = inputs.hour[rows[hourly]]
+        if prices.is_series:
+            # Hours outside the series fail their own row, not the group
+            hour_slots = hours * prices.slots_per_hour
+            outside = (hour_slots < 0) | (hour_slots >= len(prices))
+            for index in hourly[outside].tolist():
+                errors[int(rows[index])] = f"Hour {inputs.hour[rows[index]]} is outside the loaded price series"
+            hourly, hours = hourly[~outside], hours[~outside]
+        slots[hourly] = prices.slots_for_hours(hours)
+    for index in np.flatnonzero(timed).tolist():
+        row = int(rows[index])
+        try:
+            slots[index] = prices.slot_at(inputs.timestamp[row])
+        except Exception as e:
+            errors[row] = str(e)
+    return slots, errors
+
+
+async def decide_arrays(
+    inputs: DecisionArrays,
+    executor: DecisionExecutor,
+    get_prices: Callable[[Optional[str]], Awaitable[PriceTable]],
+    look_ahead_hours: int = 24,
+    enable_proactive_buying: bool = True
+) -> DecisionResults:
+    """
+    Decide for many households at once.
+
+    Rows are grouped by tariff and strategy. Each group is one
+    StrategyRegistry.decide_batch task on the executor, vectorized for
+    strategies with a batch function (the heuristic), and is priced with
+    calculate_cost_batch. The no-battery cost is what each household's net load
+    would have cost traded with the grid directly (savings.py's "no_battery"
+    baseline).
+
+    Args:
+        inputs: Decision inputs per household
+        executor: Executor running the strategies
+        get_prices: Coroutine returning the PriceTable of a tariff id (None for the grid prices)
+        look_ahead_hours: Number of hours to look ahead for price forecasting
+        enable_proactive_buying: Flag to enable proactive buying before price spikes
+
+    Returns:
+        DecisionResults: Decisions and costs per household
+    """
+    n = len(inputs)
+    results = np.zeros((6, n))
+    failed: Dict[int, str] = {}
+    if n == 0:
+        return DecisionResults(*results, failed=failed)
+
+    def fail(errors: Dict[int, str]) -> None:
+        """Fallback decision (buy all consumption) for failed rows"""
+        rows = list(errors)
+        results[2, rows] = inputs.consumption[rows]
+        failed.update(errors)
+
+    async def decide_group(tariff_id: Optional[str], strategy: Optional[str], rows: np.ndarray) -> None:
+        try:
+            prices = await get_prices(tariff_id)
+            slots, errors = _slots(prices, inputs, rows)
+            if errors:
+                fail(errors)
+                keep = np.array([row not in errors for row in rows.tolist()], dtype=bool)
+                rows, slots = rows[keep], slots[keep]
+                if not len(rows):
+                    return
+            p2p_price = inputs.p2p_price[rows]
+            *decisions, errors = await executor.decide_batch(
+                strategy,
+                prices,
+                production=inputs.production[rows],
+                consumption=inputs.consumption[rows],
+                current_storage=inputs.current_storage[rows],
+                max_storage=inputs.max_storage[rows],
+                hour=inputs.hour[rows],
+                p2p_price=p2p_price,
+                slot=slots,
+                look_ahead_hours=look_ahead_hours,
+                enable_proactive_buying=enable_proactive_buying,
+                household_id=[inputs.household_id[row] for row in rows],
+                production_forecast=[inputs.production_forecast[row] for row in rows],
+                consumption_forecast=[inputs.consumption_forecast[row] for row in rows]
+            )
+        except Exception as e:
+            # The tariff or strategy could not be loaded, or the executor failed
+            logger.error(f"Error deciding for {len(rows)} household(s) (tariff {tariff_id}, strategy {strategy}): {e}")
+            fail({row: str(e) for row in rows.tolist()})
+            return
+
+        decisions = np.array(decisions)
+        if errors:
+            # Households whose strategy raised; the others keep their decisions
+            fail({int(rows[index]): error for index, error in errors.items()})
+            keep = np.ones(len(rows), dtype=bool)
+            keep[list(errors)] = False
+            rows, slots, p2p_price, decisions = rows[keep], slots[keep], p2p_price[keep], decisions[:, keep]
+
+        energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage = decisions
+        net_load = inputs.consumption[rows] - inputs.production[rows]
+        results[:4, rows] = decisions
+        results[4, rows] = calculate_cost_batch(
+            buy_from_grid, sell_to_grid, energy_to_storage, take_from_storage, prices, 0, p2p_price, slots
+        )
+        results[5, rows] = calculate_cost_batch(
+            np.maximum(0.0, net_load), np.maximum(0.0, -net_load), 0.0, 0.0, prices, 0, p2p_price, slots
+        )
+
+    if inputs.failed:
+        fail(inputs.failed)
+    await asyncio.gather(*(
+        decide_group(tariff_id, strategy, rows) for (tariff_id, strategy), rows in _groups(inputs).items()
+    ))
+    return DecisionResults(*results, failed=failed)
@@ -0,0 +1,224 @@
+"""
+Exact storage dispatch as a linear program, solved with HiGHS through SciPy.
+
+Every request is solved from scratch. Reusing a household's previous plan
+was tried and removed: after the horizon moves by one slot the old optimum
+rarely stays optimal, and linprog cannot be given a starting basis.
+"""
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+
+from src.decisions.dp_scheduler import StorageSchedule, forecast_series, horizon_slots, slot_decision
+from src.decisions.trading import PriceTable, as_price_table
+
+# Variable blocks, each one entry per slot: buy, sell, charge, discharge and
+# the state of charge at the end of the slot
+_BLOCKS = 5
+BUY, SELL, CHARGE, DISCHARGE, STORAGE = range(_BLOCKS)
+
+
+@lru_cache(maxsize=64)
+def _constraint_matrix(horizon: int) -> sparse.csr_matrix:
+    """
+    Equality constraints of the dispatch LP for a horizon length.
+
+    Rows 0..H-1 balance each slot (buy - sell - charge + discharge = net load),
+    rows H..2H-1 carry the state of charge forward (storage[t] - storage[t-1]
+    - charge[t] + discharge[t] = 0, the initial storage on the right-hand side
+    of the first one). Only the right-hand side, bounds and costs change between
+    solves, so the matrix is built once per horizon length.
+    """
+    steps = np.arange(horizon)
+    column = lambda block: block * horizon + steps  # noqa: E731
+
+    rows = np.concatenate((
+        steps, steps, steps, steps,
+        horizon + steps, horizon + steps, horizon + steps, horizon + steps[1:]
+    ))
+    cols = np.concatenate((
+        column(BUY), column(SELL), column(CHARGE), column(DISCHARGE),
+        column(STORAGE), column(CHARGE), column(DISCHARGE), column(STORAGE)[:-1]
+    ))
+    data = np.concatenate((
+        np.ones(horizon), -np.ones(horizon), -np.ones(horizon), np.ones(horizon),
+        np.ones(horizon), -np.ones(horizon), np.ones(horizon), -np.ones(horizon - 1)
+    ))
+    return sparse.csr_matrix((data, (rows, cols)), shape=(2 * horizon, _BLOCKS * horizon))
+
+
+class LPDispatchSolver:
+    """
+    Exact cost-minimizing dispatch over the look-ahead horizon as a linear program.
+
+    Per slot the LP chooses grid purchases and sales and storage charge and
+    discharge, subject to the energy balance, the storage dynamics, the capacity
+    and an optional rate limit. The objective is the grid cost used by
+    calculate_cost minus the value of the energy left in storage at the end of
+    the horizon. Every request is solved with HiGHS; only the constraint
+    matrix is reused between requests of the same horizon length.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.solves = 0
+        self.total_solve_seconds = 0.0
+
+    def solve(
+        self,
+        production: float,
+        consumption: float,
+        current_storage: float,
+        max_storage: float,
+        grid_prices: PriceTable,
+        hour: int,
+        look_ahead_hours: int = 24,
+        production_forecast: Optional[Sequence[float]] = None,
+        consumption_forecast: Optional[Sequence[float]] = None,
+        max_rate: Optional[float] = None,
+        terminal_price: Optional[float] = None,
+        slot: Optional[int] = None
+    ) -> StorageSchedule:
+        """
+        Solve the dispatch LP over the look-ahead horizon.
+
+        Args:
+            production: Energy produced in the current slot (kWh)
+            consumption: Energy consumed in the current slot (kWh)
+            current_storage: Current energy in storage (kWh)
+            max_storage: Maximum storage capacity (kWh)
+            grid_prices: PriceTable (or DataFrame) containing grid prices
+            hour: Current hour (0-23)
+            look_ahead_hours: Planning horizon in hours
+            production_forecast: Expected production per slot from the current slot
+                on (kWh); defaults to the current production
+            consumption_forecast: Expected consumption per slot from the current
+                slot on (kWh); defaults to the current consumption
+            max_rate: Maximum energy into or out of storage per slot (kWh), unlimited if None
+            terminal_price: Value per kWh left in storage at the end of the horizon;
+                defaults to the mean grid sale price
+            slot: Price slot to start from; overrides hour
+
+        Returns:
+            StorageSchedule: Charge and grid energy per slot over the horizon
+        """
+        prices = as_price_table(grid_prices)
+        if slot is None:
+            slot = prices.slot_for_hour(hour)
+        slots = horizon_slots(prices, slot, look_ahead_hours)
+        horizon = len(slots)
+
+        purchase = prices.purchase[slots]
+        # Selling above the purchase price would make buying to resell unbounded
+        sale = prices.artefact("capped_sale")[slots]
+        load = (
+            forecast_series(consumption_forecast, consumption, horizon)
+            - forecast_series(production_forecast, production, horizon)
+        )
+
+        # No storage: the grid covers the net load
+        if max_storage <= 0:
+            grid = load
+            cost = float(np.sum(np.where(grid > 0, grid * purchase, grid * sale)))
+            return StorageSchedule(slots, np.zeros(horizon), grid, cost)
+
+        if terminal_price is None:
+            terminal_price = prices.stats.mean_sale
+        storage = min(max(float(current_storage), 0.0), max_storage)
+
+        costs = np.zeros(_BLOCKS * horizon)
+        costs[BUY * horizon:(BUY + 1) * horizon] = purchase
+        costs[SELL * horizon:(SELL + 1) * horizon] = -sale
+        costs[-1] = -terminal_price
+
+        rhs = np.zeros(2 * horizon)
+        rhs[:horizon] = load
+        rhs[horizon] = storage
+
+        rate = np.inf if max_rate is None else max(float(max_rate), 0.0)
+        upper = np.concatenate((
+            np.full(2 * horizon, np.inf), np.full(2 * horizon, rate), np.full(horizon, float(max_storage))
+        ))
+
+        start = time.perf_counter()
+        result = linprog(
+            costs, A_eq=_constraint_matrix(horizon), b_eq=rhs,
+            bounds=np.column_stack((np.zeros_like(upper), upper)),
+            # Dual simplex without presolve is fastest on LPs this small
+            method="highs-ds", options={"presolve": False}
+        )
+        elapsed = time.perf_counter() - start
+        if result.status != 0:
+            raise RuntimeError(f"LP dispatch failed: {result.message}")
+        with self._lock:
+            self.solves += 1
+            self.total_solve_seconds += elapsed
+
+        blocks = result.x.reshape(_BLOCKS, horizon)
+        charge = blocks[CHARGE] - blocks[DISCHARGE]
+        grid = blocks[BUY] - blocks[SELL]
+        cost = float(purchase @ blocks[BUY] - sale @ blocks[SELL])
+        return StorageSchedule(slots, charge, grid, cost)
+
+    def stats(self) -> Dict[str, float]:
+        """Solve counters"""
+        with self._lock:
+            return {
+                "solves": self.solves,
+                "structures": _constraint_matrix.cache_info().currsize,
+                "mean_solve_seconds": self.total_solve_seconds / self.solves if self.solves else 0.0,
+            }
+
+
+# Shared solver, so its counters cover all requests
+lp_dispatch_solver = LPDispatchSolver()
+
+
+def decide_energy_distribution_lp(
+    production: float,
+    consumption: float,
+    current_storage: float,
+    max_storage: float,
+    grid_prices: PriceTable,
+    hour: int,
+    p2p_price: float,
+    look_ahead_hours: int = 24,
+    production_forecast: Optional[Sequence[float]] = None,
+    consumption_forecast: Optional[Sequence[float]] = None,
+    max_rate: Optional[float] = None,
+    slot: Optional[int] = None,
+    solver: Optional[LPDispatchSolver] = None
+) -> Tuple[float, float, float, float]:
+    """
+    Decide the current slot's energy distribution from the LP dispatch.
+
+    The first slot of the exact optimal plan, with no state-of-charge grid; the
+    solver is the shared one unless another is given. Like the DP it plans grid
+    trades only and ignores p2p_price.
+
+    Returns:
+        Tuple of:
+        - energy_to_storage: Energy to add to storage (kWh)
+        - sell_to_grid: Energy to sell to grid (kWh)
+        - buy_from_grid: Energy to buy from grid (kWh)
+        - take_from_storage: Energy to take from storage (kWh)
+    """
+    schedule = (solver or lp_dispatch_solver).solve(
+        production=production,
+        consumption=consumption,
+        current_storage=current_storage,
+        max_storage=max_storage,
+        grid_prices=grid_prices,
+        hour=hour,
+        look_ahead_hours=look_ahead_hours,
+        production_forecast=production_forecast,
+        consumption_forecast=consumption_forecast,
+        max_rate=max_rate,
+        slot=slot
+    )
+    return slot_decision(float(schedule.charge[0]), float(schedule.grid[0]))
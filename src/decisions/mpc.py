@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import threading
+import time
+
+import numpy as np
+
+from src.decisions.dp_scheduler import StorageSchedule, slot_decision, solve_storage_schedule
+from src.decisions.trading import PriceTable, as_price_table
+
+
+@dataclass
+class _HouseholdPlan:
+    """Stored plan for one household, followed step by step until reality deviates"""
+    version: str
+    max_storage: float
+    slots: Tuple[int, ...]
+    charge: Tuple[float, ...]
+    load: Tuple[float, ...]
+    storage: Tuple[float, ...]  # Expected storage at the start of each step
+    step: int
+    last_used: float
+
+
+class MPCController:
+    """
+    Rolling-horizon model-predictive control with incremental re-planning.
+
+    Each household gets a storage plan for the next look_ahead_hours from a
+    planner (solve_storage_schedule by default, or any function with its
+    signature such as LPDispatchSolver.solve). On later requests the plan is
+    shifted forward to the current slot, and as long as the price table, the
+    capacity, the storage level and the net load match what the plan expected
+    (within tolerance kWh) the planned charge is applied without optimizing
+    again, in O(1). A deviation, a price reload or the end of the plan triggers
+    a new plan from the current state.
+
+    Plans live in a bounded LRU store; households idle for longer than
+    idle_seconds are dropped as well.
+    """
+
+    def __init__(
+        self,
+        planner: Callable[..., StorageSchedule] = solve_storage_schedule,
+        tolerance: float = 0.05,
+        max_households: int = 10000,
+        idle_seconds: float = 3600.0
+    ):
+        """
+        Args:
+            planner: Function returning a StorageSchedule, called with the
+                solve_storage_schedule keyword arguments
+            tolerance: Largest storage or net load deviation (kWh) still served from the plan
+            max_households: Number of household plans kept (least recently used are evicted)
+            idle_seconds: Plans unused for this long are evicted
+        """
+        self.planner = planner
+        self.tolerance = tolerance
+        self.max_households = max_households
+        self.idle_seconds = idle_seconds
+        self._plans: "OrderedDict[str, _HouseholdPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.plan_hits = 0
+        self.replans = 0
+        self.evictions = 0
+
+    def _follow(self, plan: _HouseholdPlan, version: str, slot: int, load: float,
+                current_storage: float, max_storage: float) -> Optional[int]:
+        """Step of the plan for the current request, or None if the plan no longer applies"""
+        if plan.version != version or plan.max_storage != max_storage:
+            return None
+        # The current slot is either the step already served (a repeated request) or the next one
+        for step in (plan.step + 1, plan.step):
+            if step < len(plan.slots) and plan.slots[step] == slot:
+                break
+        else:
+            return None
+        if (
+            abs(plan.storage[step] - current_storage) > self.tolerance
+            or abs(plan.load[step] - load) > self.tolerance
+        ):
+            return None
+        return step
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop least recently used plans beyond the size limit or idle for too long (lock held)"""
+        while self._plans:
+            household_id, plan = next(iter(self._plans.items()))
+            if len(self._plans) <= self.max_households and now - plan.last_used <= self.idle_seconds:
+                break
+            del self._plans[household_id]
+            self.evictions += 1
+
+    def decide(
+        self,
+        production: float,
+        consumption: float,
+        current_storage: float,
+        max_storage: float,
+        grid_prices: PriceTable,
+        hour: int,
+        p2p_price: float,
+        look_ahead_hours: int = 24,
+        production_forecast: Optional[Sequence[float]] = None,
+        consumption_forecast: Optional[Sequence[float]] = None,
+        slot: Optional[int] = None,
+        household_id: Optional[str] = None
+    ) -> Tuple[float, float, float, float]:
+        """
+        Decide the current slot's energy distribution from the household's plan.
+
+        Drop-in alternative to decide_energy_distribution. Without a
+        household_id every request is planned from scratch.
+
+        Returns:
+            Tuple of:
+            - energy_to_storage: Energy to add to storage (kWh)
+            - sell_to_grid: Energy to sell to grid (kWh)
+            - buy_from_grid: Energy to buy from grid (kWh)
+            - take_from_storage: Energy to take from storage (kWh)
+        """
+        prices = as_price_table(grid_prices)
+        if slot is None:
+            slot = prices.slot_for_hour(hour)
+        load = consumption - production
+        now = time.monotonic()
+
+        step = None
+        if household_id is not None:
+            with self._lock:
+                plan = self._plans.get(household_id)
+                if plan is not None:
+                    step = self._follow(plan, prices.version, slot, load, current_storage, max_storage)
+                    if step is not None:
+                        plan.step = step
+                        plan.last_used = now
+                        self._plans.move_to_end(household_id)
+                        self.plan_hits += 1
+
+        if step is not None:
+            # Small deviations are absorbed by the grid; the storage stays within bounds
+            charge = min(max(plan.charge[step], -current_storage), max_storage - current_storage)
+        else:
+            schedule = self.planner(
+                production=production,
+                consumption=consumption,
+                current_storage=current_storage,
+                max_storage=max_storage,
+                grid_prices=prices,
+                hour=hour,
+                look_ahead_hours=look_ahead_hours,
+                production_forecast=production_forecast,
+                consumption_forecast=consumption_forecast,
+                slot=slot
+            )
+            charge = float(schedule.charge[0])
+            with self._lock:
+                self.replans += 1
+                if household_id is not None:
+                    storage = np.concatenate(([current_storage], current_storage + np.cumsum(schedule.charge)))
+                    self._plans[household_id] = _HouseholdPlan(
+                        version=prices.version,
+                        max_storage=max_storage,
+                        slots=tuple(schedule.slots.tolist()),
+                        charge=tuple(schedule.charge.tolist()),
+                        load=tuple((schedule.grid - schedule.charge).tolist()),
+                        storage=tuple(storage[:-1].tolist()),
+                        step=0,
+                        last_used=now
+                    )
+                    self._plans.move_to_end(household_id)
+                    self._evict_idle(now)
+
+        return slot_decision(charge, load + charge)
+
+    def clear(self) -> None:
+        """Forget all household plans"""
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Plan store counters"""
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return {
+                "households": len(self._plans),
+                "plan_hits": self.plan_hits,
+                "replans": self.replans,
+                "evictions": self.evictions,
+            }
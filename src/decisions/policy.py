@@ -0,0 +1,391 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from src.decisions.batch import decide_energy_distribution_batch
+from src.decisions.trading import PriceTable, as_price_table, decide_energy_distribution
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PolicyTable:
+    """
+    decide_energy_distribution compiled into a lookup table for one price table and capacity.
+
+    The four outputs are stored as float32 on a regular grid of (slot, energy
+    balance, state-of-charge fraction, p2p/sale price ratio) and answered by
+    multilinear interpolation over the last three axes, so a lookup costs the
+    same whatever the compiled function does. The heuristic has thresholds, so
+    interpolated values near them differ from the exact decision; max_error and
+    mean_error are measured on random points when the table is compiled.
+
+    Attributes:
+        version: Version of the price table the policy was compiled for
+        max_storage: Storage capacity the policy was compiled for (kWh)
+        max_balance: Energy balance axis covers -max_balance..max_balance (kWh)
+        max_ratio: p2p/sale price ratio axis covers 0..max_ratio
+        values: Outputs per grid point, shape (slots, balance, soc, ratio, 4)
+        max_error: Largest absolute output error on the sample (kWh)
+        mean_error: Mean absolute output error on the sample (kWh)
+    """
+    version: str
+    max_storage: float
+    max_balance: float
+    max_ratio: float
+    values: np.ndarray
+    max_error: float = 0.0
+    mean_error: float = 0.0
+
+    def __post_init__(self):
+        _, balance_points, soc_points, ratio_points, _ = self.values.shape
+        object.__setattr__(self, "_flat", self.values.reshape(-1, 4))
+        # Flat offsets of the 8 corners of a grid cell, in (balance, soc, ratio) bit order
+        object.__setattr__(self, "_corners", np.array([
+            (b * soc_points + s) * ratio_points + r
+            for b in (0, 1) for s in (0, 1) for r in (0, 1)
+        ]))
+
+    @classmethod
+    def compile(
+        cls,
+        grid_prices: PriceTable,
+        max_storage: float,
+        look_ahead_hours: int = 24,
+        enable_proactive_buying: bool = True,
+        max_balance: float = 10.0,
+        balance_points: int = 41,
+        soc_points: int = 21,
+        max_ratio: float = 2.0,
+        ratio_points: int = 21,
+        samples: int = 20000,
+        seed: int = 0
+    ) -> "PolicyTable":
+        """
+        Evaluate the decision on the whole grid at once and measure the interpolation error.
+
+        Args:
+            grid_prices: PriceTable (or DataFrame) containing grid prices
+            max_storage: Storage capacity to compile for (kWh)
+            look_ahead_hours: Number of hours to look ahead for price spikes
+            enable_proactive_buying: Flag to enable proactive buying before price spikes
+            max_balance: Largest surplus or deficit covered (kWh)
+            balance_points: Grid points on the energy balance axis
+            soc_points: Grid points on the state-of-charge fraction axis
+            max_ratio: Largest p2p/sale price ratio covered
+            ratio_points: Grid points on the price ratio axis
+            samples: Random points used to measure the error (0 to skip)
+            seed: Seed for the error sample
+
+        Returns:
+            PolicyTable: The compiled policy
+        """
+        prices = as_price_table(grid_prices)
+        slots = np.arange(len(prices))[:, None, None, None]
+        balance = np.linspace(-max_balance, max_balance, balance_points)[None, :, None, None]
+        soc = np.linspace(0.0, 1.0, soc_points)[None, None, :, None]
+        ratio = np.linspace(0.0, max_ratio, ratio_points)[None, None, None, :]
+
+        decision = decide_energy_distribution_batch(
+            production=np.maximum(balance, 0.0),
+            consumption=np.maximum(-balance, 0.0),
+            current_storage=soc * max_storage,
+            max_storage=max_storage,
+            grid_prices=prices,
+            hour=0,
+            p2p_price=ratio * prices.sale[slots],
+            look_ahead_hours=look_ahead_hours,
+            enable_proactive_buying=enable_proactive_buying,
+            slot=slots
+        )
+        values = np.stack(decision, axis=-1).astype(np.float32)
+        values.flags.writeable = False
+        policy = cls(prices.version, float(max_storage), float(max_balance), float(max_ratio), values)
+        if samples <= 0:
+            return policy
+
+        rng = np.random.default_rng(seed)
+        sample_slots = rng.integers(len(prices), size=samples)
+        sample_balance = rng.uniform(-max_balance, max_balance, samples)
+        sample_soc = rng.uniform(0.0, 1.0, samples)
+        sample_ratio = rng.uniform(0.0, max_ratio, samples)
+        exact = np.stack(decide_energy_distribution_batch(
+            production=np.maximum(sample_balance, 0.0),
+            consumption=np.maximum(-sample_balance, 0.0),
+            current_storage=sample_soc * max_storage,
+            max_storage=max_storage,
+            grid_prices=prices,
+            hour=0,
+            p2p_price=sample_ratio * prices.sale[sample_slots],
+            look_ahead_hours=look_ahead_hours,
+            enable_proactive_buying=enable_proactive_buying,
+            slot=sample_slots
+        ), axis=-1)
+        error = np.abs(policy.interpolate(sample_slots, sample_balance, sample_soc, sample_ratio) - exact)
+        object.__setattr__(policy, "max_error", float(error.max()))
+        object.__setattr__(policy, "mean_error", float(error.mean()))
+        return policy
+
+    def interpolate(self, slots: np.ndarray, balance: np.ndarray, soc: np.ndarray, ratio: np.ndarray) -> np.ndarray:
+        """Interpolated outputs for arrays of grid coordinates (inside the grid), shape (n, 4)"""
+        _, balance_points, soc_points, ratio_points, _ = self.values.shape
+        positions = []
+        for value, low, high, points in (
+            (balance, -self.max_balance, self.max_balance, balance_points),
+            (soc, 0.0, 1.0, soc_points),
+            (ratio, 0.0, self.max_ratio, ratio_points),
+        ):
+            scaled = (np.asarray(value, dtype=np.float64) - low) * ((points - 1) / (high - low))
+            index = np.clip(scaled.astype(np.int64), 0, points - 2)
+            positions.append((index, scaled - index))
+        (b, tb), (s, ts), (r, tr) = positions
+
+        base = ((np.asarray(slots) * balance_points + b) * soc_points + s) * ratio_points + r
+        result = np.zeros((len(base), 4))
+        for corner, offset in enumerate(self._corners):
+            weight = (
+                (tb if corner & 4 else 1.0 - tb)
+                * (ts if corner & 2 else 1.0 - ts)
+                * (tr if corner & 1 else 1.0 - tr)
+            )
+            result += weight[:, None] * self._flat[base + offset]
+        return result
+
+    def decide(
+        self,
+        production: float,
+        consumption: float,
+        current_storage: float,
+        slot: int,
+        p2p_price: float,
+        sale_price: float
+    ) -> Optional[Tuple[float, float, float, float]]:
+        """Interpolated decision for one request, or None if it lies outside the compiled grid"""
+        balance = production - consumption
+        soc = current_storage / self.max_storage if self.max_storage > 0 else 0.0
+        if sale_price <= 0 or not (-self.max_balance <= balance <= self.max_balance and 0.0 <= soc <= 1.0):
+            return None
+        ratio = p2p_price / sale_price
+        if not 0.0 <= ratio <= self.max_ratio:
+            return None
+
+        _, balance_points, soc_points, ratio_points, _ = self.values.shape
+        fb = (balance + self.max_balance) * ((balance_points - 1) / (2 * self.max_balance))
+        fs = soc * (soc_points - 1)
+        fr = ratio * ((ratio_points - 1) / self.max_ratio)
+        b, s, r = min(int(fb), balance_points - 2), min(int(fs), soc_points - 2), min(int(fr), ratio_points - 2)
+        tb, ts, tr = fb - b, fs - s, fr - r
+        ub, us, ur = 1.0 - tb, 1.0 - ts, 1.0 - tr
+
+        weights = np.array((
+            ub * us * ur, ub * us * tr, ub * ts * ur, ub * ts * tr,
+            tb * us * ur, tb * us * tr, tb * ts * ur, tb * ts * tr
+        ))
+        base = ((slot * balance_points + b) * soc_points + s) * ratio_points + r
+        energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage = (
+            weights @ self._flat[base + self._corners]
+        ).tolist()
+        return energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage
+
+
+class PolicyCompiler:
+    """
+    Serves decisions from compiled PolicyTables, compiling them in the background.
+
+    Policies are kept per (price version, capacity bucket) in a small LRU.
+    Capacities are rounded to capacity_resolution, so households with nearly the
+    same battery share a policy; a decision that would store more than the
+    household's own battery holds stores only what fits and sells (or does not
+    buy) the rest. A request without a compiled policy, or outside its grid,
+    gets the exact decide_energy_distribution result while the policy is queued
+    for compilation.
+
+    Compiles run one at a time on a single background thread, and at most
+    max_policies are queued. Price tables longer than max_slots (e.g. a week of
+    15-minute prices) are not compiled at all: the table and the compile's
+    working memory grow with every slot, so those requests always get the
+    exact heuristic. recompile() queues the most recently used capacities for a
+    new price table and returns at once.
+    """
+
+    def __init__(
+        self,
+        max_policies: int = 16,
+        capacity_resolution: float = 0.5,
+        max_slots: int = 96,
+        **compile_options
+    ):
+        """
+        Args:
+            max_policies: Number of compiled policies kept (least recently used
+                are evicted), and most capacities remembered or compiles queued
+            capacity_resolution: Width of a capacity bucket (kWh), 0 to compile
+                every exact capacity
+            max_slots: Longest price table compiled (slots)
+            **compile_options: Grid options passed to PolicyTable.compile
+        """
+        self.max_policies = max_policies
+        self.capacity_resolution = capacity_resolution
+        self.max_slots = max_slots
+        self.compile_options = compile_options
+        self._policies: "OrderedDict[Tuple[str, float], PolicyTable]" = OrderedDict()
+        self._pending = set()
+        # Capacity buckets in use, most recently used last
+        self._capacities: "OrderedDict[float, None]" = OrderedDict()
+        self._queue: "queue.Queue[Tuple[PriceTable, float]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.fallbacks = 0
+        self.refused = 0
+        self.compiles = 0
+        self.last_compile_seconds = 0.0
+
+    def _bucket(self, max_storage: float) -> float:
+        """Capacity a policy is compiled for"""
+        if self.capacity_resolution <= 0:
+            return float(max_storage)
+        return round(round(max_storage / self.capacity_resolution) * self.capacity_resolution, 6)
+
+    def _compile(self, prices: PriceTable, max_storage: float) -> None:
+        key = (prices.version, max_storage)
+        try:
+            start = time.perf_counter()
+            policy = PolicyTable.compile(prices, max_storage, **self.compile_options)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"Compiled policy for prices {prices.version}, capacity {max_storage} kWh "
+                f"in {elapsed:.2f}s (max error {policy.max_error:.4f} kWh)"
+            )
+            with self._lock:
+                self._policies[key] = policy
+                self._policies.move_to_end(key)
+                while len(self._policies) > self.max_policies:
+                    self._policies.popitem(last=False)
+                self.compiles += 1
+                self.last_compile_seconds = elapsed
+        except Exception as e:
+            logger.error(f"Error compiling policy for capacity {max_storage} kWh: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _run(self) -> None:
+        """Compile queued policies one at a time"""
+        while True:
+            prices, max_storage = self._queue.get()
+            self._compile(prices, max_storage)
+
+    def _enqueue(self, prices: PriceTable, capacities) -> None:
+        """Queue compiles of the given capacity buckets; call with the lock held"""
+        for capacity in capacities:
+            key = (prices.version, capacity)
+            if key in self._pending or key in self._policies or len(self._pending) >= self.max_policies:
+                continue
+            self._pending.add(key)
+            self._queue.put((prices, capacity))
+        if self._pending and self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="policy-compiler", daemon=True)
+            self._worker.start()
+
+    def _compile_in_background(self, prices: PriceTable, capacity: float) -> None:
+        with self._lock:
+            if len(prices) > self.max_slots:
+                self.refused += 1
+                return
+            self._capacities[capacity] = None
+            self._capacities.move_to_end(capacity)
+            while len(self._capacities) > self.max_policies:
+                self._capacities.popitem(last=False)
+            self._enqueue(prices, (capacity,))
+
+    def recompile(self, grid_prices: PriceTable) -> None:
+        """Queue policies for the recently used capacities against a new price table"""
+        prices = as_price_table(grid_prices)
+        if len(prices) > self.max_slots:
+            return
+        with self._lock:
+            self._enqueue(prices, reversed(self._capacities))
+
+    def decide(
+        self,
+        production: float,
+        consumption: float,
+        current_storage: float,
+        max_storage: float,
+        grid_prices: PriceTable,
+        hour: int,
+        p2p_price: float,
+        look_ahead_hours: int = 24,
+        enable_proactive_buying: bool = True,
+        slot: Optional[int] = None
+    ) -> Tuple[float, float, float, float]:
+        """Compiled drop-in for decide_energy_distribution (same arguments and result)"""
+        prices = as_price_table(grid_prices)
+        if slot is None:
+            slot = prices.slot_for_hour(hour)
+
+        capacity = self._bucket(max_storage)
+        with self._lock:
+            policy = self._policies.get((prices.version, capacity))
+        if policy is not None and (
+            look_ahead_hours == self.compile_options.get("look_ahead_hours", 24)
+            and enable_proactive_buying == self.compile_options.get("enable_proactive_buying", True)
+        ):
+            decision = policy.decide(production, consumption, current_storage, slot, p2p_price, prices.slot_prices[slot][1])
+            if decision is not None:
+                with self._lock:
+                    self.hits += 1
+                return self._fit(decision, current_storage, max_storage)
+        elif policy is None and capacity > 0:
+            self._compile_in_background(prices, capacity)
+
+        with self._lock:
+            self.fallbacks += 1
+        return decide_energy_distribution(
+            production=production,
+            consumption=consumption,
+            current_storage=current_storage,
+            max_storage=max_storage,
+            grid_prices=prices,
+            hour=hour,
+            p2p_price=p2p_price,
+            look_ahead_hours=look_ahead_hours,
+            enable_proactive_buying=enable_proactive_buying,
+            slot=slot
+        )
+
+    @staticmethod
+    def _fit(
+        decision: Tuple[float, float, float, float], current_storage: float, max_storage: float
+    ) -> Tuple[float, float, float, float]:
+        """A decision for a bucket's capacity, storing no more than the household's battery holds"""
+        energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage = decision
+        excess = energy_to_storage - max(max_storage - current_storage, 0.0)
+        if excess > 0:
+            energy_to_storage -= excess
+            not_bought = min(excess, buy_from_grid)
+            buy_from_grid -= not_bought
+            sell_to_grid += excess - not_bought
+        return energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage
+
+    def stats(self) -> Dict[str, float]:
+        """Policy counters and the largest measured error of the loaded policies"""
+        with self._lock:
+            return {
+                "policies": len(self._policies),
+                "queued": len(self._pending),
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "refused": self.refused,
+                "compiles": self.compiles,
+                "last_compile_seconds": self.last_compile_seconds,
+                "max_error": max((policy.max_error for policy in self._policies.values()), default=0.0),
+            }
@@ -0,0 +1,298 @@
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+import heapq
+import math
+import threading
+
+import numpy as np
+
+from src.decisions.trading import PriceStats, PriceTable, SlotStats
+
+
+class _QuantileTracker:
+    """
+    A quantile of a changing multiset of values, O(log n) per insert or removal.
+
+    The values are split into two heaps: the lowest floor(q * (n - 1)) + 1 in a
+    max-heap and the rest in a min-heap, so the two order statistics around the
+    quantile are the heap tops. Removals are lazy: a removed value is counted and
+    only dropped once it reaches the top of its heap, or when the heaps are
+    rebuilt after enough removals. The result matches np.percentile's default
+    linear interpolation.
+    """
+
+    def __init__(self, q: float, values: Iterable[float] = ()):
+        self.q = q
+        self._fill(values)
+
+    def _fill(self, values: Iterable[float]) -> None:
+        ordered = sorted(values)
+        split = self._low_target(len(ordered))
+        self._low = [-value for value in ordered[:split]]
+        self._high = ordered[split:]
+        heapq.heapify(self._low)
+        heapq.heapify(self._high)
+        self._low_size = len(self._low)
+        self._high_size = len(self._high)
+        self._low_removed: Counter = Counter()
+        self._high_removed: Counter = Counter()
+
+    def __len__(self) -> int:
+        return self._low_size + self._high_size
+
+    def _low_target(self, n: int) -> int:
+        return int(math.floor(self.q * (n - 1))) + 1 if n else 0
+
+    def _prune(self) -> None:
+        """Drop removed values from the heap tops"""
+        while self._low and self._low_removed[-self._low[0]]:
+            self._low_removed[-heapq.heappop(self._low)] -= 1
+        while self._high and self._high_removed[self._high[0]]:
+            self._high_removed[heapq.heappop(self._high)] -= 1
+
+    def _compact(self) -> None:
+        """Rebuild the heaps once removed values outnumber the live ones"""
+        if len(self._low) + len(self._high) <= 2 * len(self) + 16:
+            return
+        live = []
+        for heap, removed, sign in ((self._low, self._low_removed, -1), (self._high, self._high_removed, 1)):
+            for entry in heap:
+                value = sign * entry
+                if removed[value]:
+                    removed[value] -= 1
+                else:
+                    live.append(value)
+        self._fill(live)
+
+    def _rebalance(self) -> None:
+        target = self._low_target(len(self))
+        while self._low_size > target:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune()
+        while self._low_size < target:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._low_size += 1
+            self._high_size -= 1
+            self._prune()
+
+    def add(self, value: float) -> None:
+        if self._low_size and value <= -self._low[0]:
+            heapq.heappush(self._low, -value)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, value)
+            self._high_size += 1
+        self._rebalance()
+
+    def remove(self, value: float) -> None:
+        """Remove one occurrence of a value known to be present"""
+        if self._low_size and value <= -self._low[0]:
+            self._low_removed[value] += 1
+            self._low_size -= 1
+        else:
+            self._high_removed[value] += 1
+            self._high_size -= 1
+        self._prune()
+        self._rebalance()
+        self._compact()
+
+    def value(self) -> float:
+        n = len(self)
+        if n == 0:
+            return math.nan
+        position = self.q * (n - 1)
+        t = position - math.floor(position)
+        a = -self._low[0]
+        if t == 0 or not self._high_size:
+            return a
+        b = self._high[0]
+        # Same rounding as np.percentile's linear interpolation
+        return b - (b - a) * (1 - t) if t >= 0.5 else a + (b - a) * t
+
+
+class _DayStats:
+    """
+    Running PriceStats of one day's slots.
+
+    Welford's method keeps the purchase mean and variance and the sale mean in
+    O(1) per change, and a _QuantileTracker the 75th percentile of sale prices
+    in O(log n).
+    """
+
+    def __init__(self, start: int, purchase: Sequence[float], sale: Sequence[float]):
+        n = len(purchase)
+        self.start = start
+        self.n = n
+        self.purchase_mean = math.fsum(purchase) / n
+        self.purchase_m2 = math.fsum((price - self.purchase_mean) ** 2 for price in purchase)
+        self.sale_mean = math.fsum(sale) / n
+        self.sale_quantile = _QuantileTracker(0.75, sale)
+
+    def add(self, purchase: float, sale: float) -> None:
+        self.n += 1
+        delta = purchase - self.purchase_mean
+        self.purchase_mean += delta / self.n
+        self.purchase_m2 += delta * (purchase - self.purchase_mean)
+        self.sale_mean += (sale - self.sale_mean) / self.n
+        self.sale_quantile.add(sale)
+
+    def replace_purchase(self, old: float, new: float) -> None:
+        old_mean = self.purchase_mean
+        self.purchase_mean += (new - old) / self.n
+        self.purchase_m2 += (new - old) * (new - self.purchase_mean + old - old_mean)
+
+    def replace_sale(self, old: float, new: float) -> None:
+        self.sale_mean += (new - old) / self.n
+        self.sale_quantile.remove(old)
+        self.sale_quantile.add(new)
+
+    def stats(self) -> PriceStats:
+        std_purchase = math.sqrt(max(self.purchase_m2, 0.0) / self.n)
+        return PriceStats(
+            mean_purchase=self.purchase_mean,
+            std_purchase=std_purchase,
+            mean_sale=self.sale_mean,
+            purchase_spike_threshold=self.purchase_mean + std_purchase,
+            high_sale_threshold=self.sale_quantile.value()
+        )
+
+
+class StreamingPriceState:
+    """
+    Grid prices that change slot by slot, with their per-day statistics kept current.
+
+    Decisions compare each slot against the statistics of its own calendar day
+    (see SlotStats), which PriceTable computes from scratch in O(n log n). For a
+    price feed that updates single slots (or appends new ones to a dated series)
+    this object keeps those statistics per day and updates only the day a slot
+    falls in: O(1) for the means and variance and O(log n) for the sale price
+    percentile. day_stats therefore matches SlotStats.build on the current
+    prices, up to floating point rounding of the running sums.
+
+    to_table() takes an immutable PriceTable snapshot whose slot_stats, and so
+    its spike contexts, come from the streamed statistics.
+    """
+
+    def __init__(
+        self,
+        purchase: Sequence[float],
+        sale: Sequence[float],
+        slot_minutes: int = 60,
+        start: Optional[datetime] = None
+    ):
+        """
+        Args:
+            purchase: Grid purchase price per slot
+            sale: Grid sale price per slot
+            slot_minutes: Length of one slot in minutes
+            start: Start of the first slot for a dated series, None for a daily profile
+        """
+        self._purchase: List[float] = [float(price) for price in purchase]
+        self._sale: List[float] = [float(price) for price in sale]
+        if len(self._purchase) != len(self._sale) or not self._purchase:
+            raise ValueError("Purchase and sale prices must be non-empty and of equal length")
+        self.slot_minutes = slot_minutes
+        self.start = start
+        self._lock = threading.Lock()
+        self._table: Optional[PriceTable] = None
+
+        # Days are contiguous runs of slots; a daily profile is a single day
+        n = len(self._purchase)
+        day_starts = [0]
+        if start is not None:
+            day_starts += [slot for slot in range(1, n) if self._day_of(slot) != self._day_of(slot - 1)]
+        self._days: List[_DayStats] = [
+            _DayStats(a, self._purchase[a:b], self._sale[a:b]) for a, b in zip(day_starts, day_starts[1:] + [n])
+        ]
+        self._day_starts = day_starts
+
+    @classmethod
+    def from_table(cls, table: PriceTable) -> "StreamingPriceState":
+        """Start from the prices of a PriceTable"""
+        return cls(table.purchase.tolist(), table.sale.tolist(), table.slot_minutes, table.start)
+
+    def __len__(self) -> int:
+        return len(self._purchase)
+
+    def _day_of(self, slot: int) -> date:
+        """Calendar day a slot of a dated series falls in"""
+        return (self.start + timedelta(minutes=slot * self.slot_minutes)).date()
+
+    def _day(self, slot: int) -> _DayStats:
+        if not 0 <= slot < len(self._purchase):
+            raise IndexError(f"Slot {slot} is outside the price series")
+        return self._days[bisect_right(self._day_starts, slot) - 1]
+
+    def prices(self, slot: int) -> Tuple[float, float]:
+        """Current (purchase, sale) prices of a slot"""
+        return self._purchase[slot], self._sale[slot]
+
+    def update(self, slot: int, purchase: Optional[float] = None, sale: Optional[float] = None) -> None:
+        """
+        Replace the prices of one slot; a price left as None keeps its value.
+
+        Args:
+            slot: Slot index to update
+            purchase: New grid purchase price
+            sale: New grid sale price
+        """
+        with self._lock:
+            day = self._day(slot)
+            if purchase is not None:
+                new = float(purchase)
+                day.replace_purchase(self._purchase[slot], new)
+                self._purchase[slot] = new
+            if sale is not None:
+                new = float(sale)
+                day.replace_sale(self._sale[slot], new)
+                self._sale[slot] = new
+            self._table = None
+
+    def append(self, purchase: float, sale: float) -> None:
+        """Add a slot at the end of a dated series"""
+        if self.start is None:
+            raise ValueError("A daily price profile has a fixed number of slots")
+        purchase, sale = float(purchase), float(sale)
+        with self._lock:
+            slot = len(self._purchase)
+            self._purchase.append(purchase)
+            self._sale.append(sale)
+            if self._day_of(slot) != self._day_of(slot - 1):
+                self._days.append(_DayStats(slot, [purchase], [sale]))
+                self._day_starts.append(slot)
+            else:
+                self._days[-1].add(purchase, sale)
+            self._table = None
+
+    def day_stats(self, slot: int) -> PriceStats:
+        """Price statistics of the day a slot falls in"""
+        with self._lock:
+            return self._day(slot).stats()
+
+    def is_spike(self, slot: int) -> bool:
+        """Whether a slot's purchase price is above its day's spike threshold"""
+        return self._purchase[slot] > self.day_stats(slot).purchase_spike_threshold
+
+    def to_table(self, look_ahead_hours: int = 24) -> PriceTable:
+        """
+        Immutable snapshot of the current prices, reused until the prices change.
+
+        Args:
+            look_ahead_hours: Look-ahead window to build the snapshot's spike context for
+        """
+        with self._lock:
+            if self._table is None:
+                table = PriceTable(
+                    np.array(self._purchase), np.array(self._sale), slot_minutes=self.slot_minutes, start=self.start
+                )
+                day_index = np.repeat(np.arange(len(self._days)), [day.n for day in self._days])
+                # Seed the cached slot_stats so spike contexts use the streamed statistics
+                table.__dict__['slot_stats'] = SlotStats.from_days([day.stats() for day in self._days], day_index)
+                self._table = table
+            table = self._table
+        table.spike_context(look_ahead_hours)
+        return table
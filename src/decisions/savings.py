@@ -0,0 +1,137 @@
+from typing import Callable, Dict, Optional, Sequence, Union
+import threading
+
+import numpy as np
+
+from src.decisions.batch import ArrayLike
+from src.decisions.trading import PriceTable, as_price_table
+
+
+def _row_sums(energy: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Sum of energy x price along the last axis; a matrix-vector product when prices are per step"""
+    if prices.ndim == 1:
+        return energy @ prices
+    return (energy * prices).sum(axis=-1)
+
+
+def _no_battery_cost(production, consumption, purchase, sale):
+    """Own production covers demand first; the rest is bought from or sold to the grid"""
+    net_load = consumption - production
+    return _row_sums(np.maximum(net_load, 0.0), purchase) - _row_sums(np.maximum(-net_load, 0.0), sale)
+
+
+def _grid_only_cost(production, consumption, purchase, sale):
+    """All demand is bought from the grid, as without local generation or storage"""
+    return _row_sums(consumption, purchase)
+
+
+# Baseline scenarios: name -> cost per household summed over the steps of a chunk,
+# from (production, consumption, purchase, sale) arrays
+BASELINES: Dict[str, Callable[..., np.ndarray]] = {
+    "no_battery": _no_battery_cost,
+    "grid_only": _grid_only_cost,
+}
+
+
+class SavingsEngine:
+    """
+    Counterfactual costs of a strategy's decisions against baseline scenarios.
+
+    Traces are fed in chunks (e.g. all households for one day) through add().
+    Each chunk looks up the purchase and sale prices of its slots once, then
+    prices the strategy's decisions (with the terms of calculate_cost) and every
+    baseline from those shared arrays in the same pass, and adds the results to
+    running per-household totals. Memory use is bounded by the chunk size, so a
+    year of 15-minute slots for 100k households is a few hundred chunks rather
+    than one array that does not fit in memory.
+    """
+
+    def __init__(self, n_households: int, grid_prices: PriceTable, baselines: Optional[Sequence[str]] = None):
+        """
+        Args:
+            n_households: Number of households (rows) in the traces
+            grid_prices: PriceTable (or DataFrame) containing grid prices
+            baselines: Names of BASELINES to evaluate, all of them by default
+        """
+        self.prices = as_price_table(grid_prices)
+        self.baselines = tuple(BASELINES) if baselines is None else tuple(baselines)
+        unknown = [name for name in self.baselines if name not in BASELINES]
+        if unknown:
+            raise ValueError(f"Unknown baselines: {', '.join(unknown)}")
+        self._totals = {name: np.zeros(n_households) for name in ("strategy",) + self.baselines}
+        self._lock = threading.Lock()
+        self.decisions = 0
+
+    def add(
+        self,
+        production: np.ndarray,
+        consumption: np.ndarray,
+        buy_from_grid: np.ndarray,
+        sell_to_grid: np.ndarray,
+        sell_to_p2p: np.ndarray,
+        slots: ArrayLike,
+        p2p_price: ArrayLike,
+        rows: Union[slice, np.ndarray, None] = None
+    ) -> None:
+        """
+        Add a chunk of decisions.
+
+        Args:
+            production: Energy produced, shape (households, steps)
+            consumption: Energy consumed, shape (households, steps)
+            buy_from_grid: Energy bought from the grid by the strategy
+            sell_to_grid: Energy sold to the grid by the strategy
+            sell_to_p2p: Energy sold peer-to-peer by the strategy
+            slots: Price slot of each step (steps,) or of each decision
+            p2p_price: Peer-to-peer price, broadcast against the decisions
+            rows: Households the chunk's rows belong to, all of them by default
+        """
+        production = np.asarray(production, dtype=np.float64)
+        consumption = np.asarray(consumption, dtype=np.float64)
+        shape = np.broadcast_shapes(production.shape, consumption.shape, np.shape(buy_from_grid))
+        production = np.broadcast_to(production, shape)
+        consumption = np.broadcast_to(consumption, shape)
+
+        # Price arrays shared by the strategy and all baselines; per-step prices
+        # turn the sums over steps into matrix-vector products
+        slots = np.asarray(slots, dtype=np.int64)
+        purchase = self.prices.purchase[slots]
+        sale = self.prices.sale[slots]
+
+        # Same terms as calculate_cost, summed over the chunk's steps
+        p2p_revenue = np.broadcast_to(
+            np.asarray(sell_to_p2p, dtype=np.float64) * np.asarray(p2p_price, dtype=np.float64), shape
+        )
+        costs = {
+            "strategy": (
+                _row_sums(np.broadcast_to(np.asarray(buy_from_grid, dtype=np.float64), shape), purchase)
+                - _row_sums(np.broadcast_to(np.asarray(sell_to_grid, dtype=np.float64), shape), sale)
+                - p2p_revenue.sum(axis=-1)
+            )
+        }
+        for name in self.baselines:
+            costs[name] = BASELINES[name](production, consumption, purchase, sale)
+
+        rows = slice(None) if rows is None else rows
+        with self._lock:
+            for name, cost in costs.items():
+                self._totals[name][rows] += cost
+            self.decisions += int(np.prod(shape))
+
+    def totals(self) -> Dict[str, np.ndarray]:
+        """Net cost per household for the strategy and each baseline"""
+        with self._lock:
+            return {name: totals.copy() for name, totals in self._totals.items()}
+
+    def savings(self, baseline: str) -> np.ndarray:
+        """Per-household savings of the strategy against a baseline (positive = cheaper)"""
+        with self._lock:
+            return self._totals[baseline] - self._totals["strategy"]
+
+    def summary(self) -> Dict[str, float]:
+        """Total cost of the strategy and each baseline, and the savings against each baseline"""
+        with self._lock:
+            totals = {name: float(values.sum()) for name, values in self._totals.items()}
+        for name in self.baselines:
+            totals[f"savings_vs_{name}"] = totals[name] - totals["strategy"]
+        return totals
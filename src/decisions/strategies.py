@@ -0,0 +1,267 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+
+from src.decisions.batch import ArrayLike, decide_energy_distribution_batch
+from src.decisions.decision_cache import DecisionCache
+from src.decisions.dp_scheduler import decide_energy_distribution_dp
+from src.decisions.lp_dispatch import decide_energy_distribution_lp
+from src.decisions.mpc import MPCController
+from src.decisions.policy import PolicyCompiler
+from src.decisions.trading import PRICE_ARTEFACTS, PriceTable, as_price_table, decide_energy_distribution
+
+# Keyword arguments only passed to strategies that declare them
+_OPTIONS = frozenset((
+    "enable_proactive_buying",
+    "production_forecast",
+    "consumption_forecast",
+    "household_id",
+))
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """
+    A named way of deciding the energy distribution.
+
+    Attributes:
+        name: Name requests select the strategy by
+        decide: Decision function; takes the decide_energy_distribution
+            arguments (except enable_proactive_buying) plus the declared options
+            and returns (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage)
+        artefacts: Price artefacts (see PRICE_ARTEFACTS) the strategy reads, built
+            once per price table before requests need them
+        options: Extra keyword arguments the strategy accepts, e.g. forecasts
+        batch: Optional vectorized decision function taking arrays of households
+            (see decide_energy_distribution_batch); without it batches are
+            decided one household at a time
+    """
+    name: str
+    decide: Callable[..., Tuple[float, float, float, float]]
+    artefacts: Tuple[str, ...] = ()
+    options: Tuple[str, ...] = ()
+    batch: Optional[Callable[..., Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]] = None
+
+    def __post_init__(self):
+        unknown = [name for name in self.artefacts if name not in PRICE_ARTEFACTS]
+        if unknown:
+            raise ValueError(f"Strategy {self.name} needs unknown price artefacts: {', '.join(unknown)}")
+
+
+class StrategyRegistry:
+    """
+    Decision strategies by name, sharing their price precomputation.
+
+    Each strategy declares the price artefacts it needs. prepare() builds the
+    union of them for a price table; artefacts are kept on the table itself, so
+    every strategy reads the same instance and nothing is rebuilt until the
+    prices change version.
+    """
+
+    def __init__(self, default: str = "heuristic"):
+        self.default = default
+        self._strategies: Dict[str, Strategy] = {}
+        self._lock = threading.Lock()
+
+    def register(self, strategy: Strategy) -> Strategy:
+        """Add or replace a strategy"""
+        with self._lock:
+            self._strategies[strategy.name] = strategy
+        return strategy
+
+    def get(self, name: Optional[str] = None) -> Strategy:
+        """Look up a strategy; None selects the default"""
+        strategy = self._strategies.get(self.default if name is None else name)
+        if strategy is None:
+            raise ValueError(f"Unknown strategy: {name}")
+        return strategy
+
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._strategies)
+
+    def prepare(self, grid_prices: PriceTable) -> PriceTable:
+        """Build every artefact the registered strategies need for a price table"""
+        prices = as_price_table(grid_prices)
+        with self._lock:
+            needed = {name for strategy in self._strategies.values() for name in strategy.artefacts}
+        for name in sorted(needed):
+            prices.artefact(name)
+        return prices
+
+    def decide(self, name: Optional[str], grid_prices: PriceTable, **kwargs) -> Tuple[float, float, float, float]:
+        """
+        Decide with the named strategy.
+
+        Args:
+            name: Strategy name, None for the default
+            grid_prices: PriceTable (or DataFrame) containing grid prices
+            **kwargs: decide_energy_distribution arguments plus any options; options
+                the strategy does not declare are dropped
+
+        Returns:
+            Tuple of (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage)
+        """
+        strategy = self.get(name)
+        prices = as_price_table(grid_prices)
+        for artefact in strategy.artefacts:
+            prices.artefact(artefact)
+        arguments = {key: value for key, value in kwargs.items() if key not in _OPTIONS or key in strategy.options}
+        return strategy.decide(grid_prices=prices, **arguments)
+
+    def decide_batch(
+        self,
+        name: Optional[str],
+        grid_prices: PriceTable,
+        production: ArrayLike,
+        consumption: ArrayLike,
+        current_storage: ArrayLike,
+        max_storage: ArrayLike,
+        hour: ArrayLike,
+        p2p_price: ArrayLike,
+        slot: ArrayLike,
+        look_ahead_hours: int = 24,
+        enable_proactive_buying: bool = True,
+        **options: Sequence
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[int, str]]:
+        """
+        Decide for many households with the named strategy and one price table.
+
+        Strategies with a batch function decide all households in one vectorized
+        call; the others are called once per household, and a household whose
+        decision raises is reported in the returned errors (with zero decisions)
+        without failing the others.
+
+        Args:
+            name: Strategy name, None for the default
+            grid_prices: PriceTable (or DataFrame) containing grid prices
+            production: Energy produced per household (kWh)
+            consumption: Energy consumed per household (kWh)
+            current_storage: Current energy in storage per household (kWh)
+            max_storage: Maximum storage capacity per household (kWh)
+            hour: Current hour per household
+            p2p_price: Peer-to-peer price per household
+            slot: Price slot per household
+            look_ahead_hours: Number of hours to look ahead for price forecasting
+            enable_proactive_buying: Flag to enable proactive buying before price spikes
+            **options: Per-household values of strategy options (e.g. household_id);
+                options the strategy does not declare are dropped
+
+        Returns:
+            Tuple of arrays (energy_to_storage, sell_to_grid, buy_from_grid, take_from_storage)
+            and a dict of the households (by position) that failed, with the error
+        """
+        strategy = self.get(name)
+        prices = as_price_table(grid_prices)
+        for artefact in strategy.artefacts:
+            prices.artefact(artefact)
+        if strategy.batch is not None:
+            batch_options = {"enable_proactive_buying": enable_proactive_buying}
+            batch_options = {key: value for key, value in batch_options.items() if key in strategy.options}
+            return (*strategy.batch(
+                production, consumption, current_storage, max_storage, prices, hour, p2p_price,
+                look_ahead_hours=look_ahead_hours, slot=slot, **batch_options
+            ), {})
+
+        production, consumption, current_storage, max_storage, hour, p2p_price, slot = (
+            np.broadcast_arrays(*map(np.atleast_1d, (
+                production, consumption, current_storage, max_storage, hour, p2p_price, slot
+            )))
+        )
+        options = {key: values for key, values in options.items() if key in strategy.options}
+        results = np.zeros((len(production), 4))
+        errors: Dict[int, str] = {}
+        for row in range(len(production)):
+            try:
+                results[row] = self.decide(
+                    name,
+                    prices,
+                    production=float(production[row]),
+                    consumption=float(consumption[row]),
+                    current_storage=float(current_storage[row]),
+                    max_storage=float(max_storage[row]),
+                    hour=int(hour[row]),
+                    p2p_price=float(p2p_price[row]),
+                    look_ahead_hours=look_ahead_hours,
+                    enable_proactive_buying=enable_proactive_buying,
+                    slot=int(slot[row]),
+                    **{key: values[row] for key, values in options.items()}
+                )
+            except Exception as e:
+                errors[row] = str(e)
+        return (*results.T, errors)
+
+
+def build_registry(
+    heuristic: Callable[..., Tuple[float, float, float, float]] = decide_energy_distribution,
+    mpc_controller: Optional[MPCController] = None,
+    policy_compiler: Optional[PolicyCompiler] = None
+) -> StrategyRegistry:
+    """
+    Registry with the built-in strategies: heuristic (default), policy, dp, lp and mpc.
+
+    Args:
+        heuristic: Heuristic decision function, e.g. a DecisionCache's decide. Only
+            the plain decide_energy_distribution is vectorized for batches; any
+            other function (such as a cache) is called per household, so batch
+            and single decisions agree
+        mpc_controller: Controller holding the "mpc" plans, a new one if None
+        policy_compiler: Compiler serving the "policy" strategy, a new one if None
+
+    Returns:
+        StrategyRegistry: The registry
+    """
+    mpc_controller = mpc_controller or MPCController()
+    policy_compiler = policy_compiler or PolicyCompiler()
+
+    registry = StrategyRegistry(default="heuristic")
+    registry.register(Strategy(
+        "heuristic", heuristic, artefacts=("stats", "slot_stats", "slot_prices", "spike_context"),
+        options=("enable_proactive_buying",),
+        batch=decide_energy_distribution_batch if heuristic is decide_energy_distribution else None
+    ))
+    registry.register(Strategy(
+        "policy", policy_compiler.decide, artefacts=("stats", "slot_stats", "slot_prices", "spike_context"),
+        options=("enable_proactive_buying",)
+    ))
+    registry.register(Strategy(
+        "dp", decide_energy_distribution_dp, artefacts=("stats", "capped_sale"),
+        options=("production_forecast", "consumption_forecast")
+    ))
+    registry.register(Strategy(
+        "lp", decide_energy_distribution_lp, artefacts=("stats", "capped_sale"),
+        options=("production_forecast", "consumption_forecast")
+    ))
+    registry.register(Strategy(
+        "mpc", mpc_controller.decide, artefacts=("stats", "capped_sale"),
+        options=("production_forecast", "consumption_forecast", "household_id")
+    ))
+    return registry
+
+
+def build_registry_from_options(
+    decision_cache: Optional[dict] = None,
+    mpc: Optional[dict] = None,
+    policy: Optional[dict] = None
+) -> StrategyRegistry:
+    """
+    Registry with the built-in strategies, its stateful parts built from constructor arguments.
+
+    The arguments are plain dicts, so a process pool can send them to its
+    workers and every worker builds the same registry as the agent.
+
+    Args:
+        decision_cache: DecisionCache arguments, None to decide without a cache
+        mpc: MPCController arguments
+        policy: PolicyCompiler arguments
+
+    Returns:
+        StrategyRegistry: The registry
+    """
+    cache = DecisionCache(**decision_cache) if decision_cache is not None else None
+    return build_registry(
+        heuristic=cache.decide if cache is not None else decide_energy_distribution,
+        mpc_controller=MPCController(**(mpc or {})),
+        policy_compiler=PolicyCompiler(**(policy or {}))
+    )
@@ -1,23 +1,777 @@
-import pandas as pd
-from typing import Tuple, Dict
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Callable, Tuple, Dict, Optional, Sequence, Union
+import csv
+import hashlib
+import json
 import logging
+import math
+import os
+import re
+import struct
+import threading
+import time
 import numpy as np
 
+# pandas is only needed by the optional DataFrame adapters and is imported lazily
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Load the grid prices from the CSV
-def load_grid_prices() -> pd.DataFrame:
+GRID_PRICES_PATH = 'grid_prices.csv'
+
+# Binary price snapshots (see save_price_snapshot)
+PRICE_SNAPSHOT_SUFFIX = '.prices'
+_SNAPSHOT_MAGIC = b'PRICESNP'
+_SNAPSHOT_FORMAT = 1
+_SNAPSHOT_ALIGNMENT = 64
+
+# Tariff ids double as file names in the tariff directory
+_TARIFF_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]*$')
+
+# Slot labels in grid_prices.csv, e.g. "00:00 - 01:00" or "00:00 - 00:15"
+_SLOT_RANGE_PATTERN = re.compile(r'^(\d{2}):(\d{2}) - (\d{2}):(\d{2})$')
+
+# Load the grid prices from the CSV into a DataFrame (optional pandas adapter)
+def load_grid_prices(path: str = GRID_PRICES_PATH) -> 'pd.DataFrame':
+    import pandas as pd
+
+    try:
+        return pd.read_csv(path, index_col=0)
+    except FileNotFoundError:
+        logger.error(f"{path} not found in the project root directory")
+        raise FileNotFoundError(f"{path} not found. Please ensure it exists in the project root.")
+    except Exception as e:
+        logger.error(f"Error loading grid prices: {str(e)}")
+        raise
+
+@dataclass(frozen=True)
+class PriceStats:
+    """
+    Price statistics used by the decision heuristics.
+
+    Computed once per price table so the decision path only reads them.
+    """
+    mean_purchase: float
+    std_purchase: float
+    mean_sale: float
+    purchase_spike_threshold: float  # Purchase price > mean + 1 std dev is a spike
+    high_sale_threshold: float       # 75th percentile of sale prices
+
+    @classmethod
+    def from_prices(cls, purchase: np.ndarray, sale: np.ndarray) -> 'PriceStats':
+        mean_purchase = float(np.mean(purchase))
+        std_purchase = float(np.std(purchase))
+        return cls(
+            mean_purchase=mean_purchase,
+            std_purchase=std_purchase,
+            mean_sale=float(np.mean(sale)),
+            purchase_spike_threshold=mean_purchase + std_purchase,
+            high_sale_threshold=float(np.percentile(sale, 75))
+        )
+
+@dataclass(frozen=True)
+class SlotStats:
+    """
+    The price statistics the heuristic compares each slot against.
+
+    A daily profile is compared against the whole day, as PriceStats does. A
+    dated series is compared against the calendar day each slot falls in, so
+    "spike", "cheap" and "good sell" stay relative to that day's prices rather
+    than to a week or a year of them, where an expensive day would have no
+    spikes and a cheap day would look cheap throughout.
+
+    Attributes:
+        mean_purchase: Mean purchase price of the slot's day
+        purchase_spike_threshold: Mean + 1 std dev of the day's purchase prices
+        high_sale_threshold: 75th percentile of the day's sale prices
+        slot_rows: Per-slot (mean_purchase, purchase_spike_threshold) as plain
+            Python values for the scalar decision path
+    """
+    mean_purchase: np.ndarray
+    purchase_spike_threshold: np.ndarray
+    high_sale_threshold: np.ndarray
+    slot_rows: Tuple[Tuple[float, float], ...] = field(repr=False)
+
+    @classmethod
+    def build(cls, table: 'PriceTable') -> 'SlotStats':
+        purchase, sale = table.purchase, table.sale
+        n_slots = len(purchase)
+        if table.is_series:
+            slots = np.arange(n_slots)
+            days = (np.datetime64(table.start, 'm') + slots * np.timedelta64(table.slot_minutes, 'm')).astype(
+                'datetime64[D]'
+            )
+            _, day_starts, day_index = np.unique(days, return_index=True, return_inverse=True)
+        else:
+            day_starts = np.array([0])
+            day_index = np.zeros(n_slots, dtype=np.int64)
+
+        # Days are contiguous runs of slots; each gets the statistics PriceStats
+        # computes for a whole table, so a daily profile matches stats exactly
+        day_ends = np.append(day_starts[1:], n_slots)
+        day_stats = [PriceStats.from_prices(purchase[a:b], sale[a:b]) for a, b in zip(day_starts, day_ends)]
+        return cls.from_days(day_stats, day_index)
+
+    @classmethod
+    def from_days(cls, day_stats: Sequence[PriceStats], day_index: np.ndarray) -> 'SlotStats':
+        """
+        Spread per-day statistics over the slots of each day.
+
+        Args:
+            day_stats: Statistics of each day, in order
+            day_index: Position in day_stats of each slot's day
+        """
+        day_mean = np.array([day.mean_purchase for day in day_stats])
+        day_threshold = np.array([day.purchase_spike_threshold for day in day_stats])
+        day_high_sale = np.array([day.high_sale_threshold for day in day_stats])
+
+        arrays = (day_mean[day_index], day_threshold[day_index], day_high_sale[day_index])
+        for array in arrays:
+            array.flags.writeable = False
+        slot_rows = tuple(zip(arrays[0].tolist(), arrays[1].tolist()))
+        return cls(*arrays, slot_rows=slot_rows)
+
+@dataclass(frozen=True)
+class SpikeContext:
+    """
+    Look-ahead context for every slot of a price table.
+
+    For a fixed price table and look-ahead window, the upcoming price spikes and
+    good sell hours depend only on the current slot, so they are computed once
+    and read in O(1) per decision.
+
+    Attributes:
+        look_ahead_hours: Look-ahead window the context was built for
+        next_spike_hour: Slot of the next price spike (-1 if none in the window)
+        hours_to_next_spike: Hours until the next spike (inf if none in the window)
+        next_spike_price: Purchase price at the next spike (nan if none in the window)
+        good_sell_hours: Number of upcoming slots with a high grid sale price
+        proactive_slot: Whether prices allow proactive buying in the slot
+        proactive_amount: Proactive buy before scaling by free storage (kWh),
+            see proactive_buying_amounts
+        slot_rows: Per-slot (hours_to_next_spike, good_sell_hours, proactive_slot,
+            proactive_amount) as plain Python values for the scalar decision path
+    """
+    look_ahead_hours: int
+    next_spike_hour: np.ndarray
+    hours_to_next_spike: np.ndarray
+    next_spike_price: np.ndarray
+    good_sell_hours: np.ndarray
+    proactive_slot: np.ndarray
+    proactive_amount: np.ndarray
+    slot_rows: Tuple[Tuple[float, int, bool, float], ...] = field(repr=False)
+
+    @classmethod
+    def build(cls, table: 'PriceTable', look_ahead_hours: int) -> 'SpikeContext':
+        purchase, sale, stats = table.purchase, table.sale, table.slot_stats
+        n_slots = len(purchase)
+        slots = np.arange(n_slots)
+        look_ahead = max(0, int(look_ahead_hours)) * table.slots_per_hour
+
+        # Next spike strictly after each slot. A daily profile wraps around the
+        # day; a dated series looks into the following days' real prices.
+        spike_slots = np.flatnonzero(purchase > stats.purchase_spike_threshold)
+        next_spike_hour = np.full(n_slots, -1, dtype=np.int64)
+        hours_to_next_spike = np.full(n_slots, np.inf)
+        next_spike_price = np.full(n_slots, np.nan)
+        if len(spike_slots) > 0:
+            pos = np.searchsorted(spike_slots, slots, side='right')
+            has_next = pos < len(spike_slots)
+            target = spike_slots[np.minimum(pos, len(spike_slots) - 1)]
+            if table.is_series:
+                in_window = has_next & (target - slots <= look_ahead)
+            else:
+                target = np.where(has_next, target, spike_slots[0] + n_slots)
+                in_window = target - slots <= look_ahead
+            next_spike_hour[in_window] = target[in_window] % n_slots
+            hours_to_next_spike[in_window] = (target - slots)[in_window] / table.slots_per_hour
+            next_spike_price[in_window] = purchase[next_spike_hour[in_window]]
+
+        # Good sell slots in (slot, slot + look_ahead]
+        is_good_sell = sale > stats.high_sale_threshold
+        cumulative = np.concatenate(([0], np.cumsum(is_good_sell)))
+        if table.is_series:
+            window_end = np.minimum(slots + look_ahead, n_slots - 1)
+            good_sell_hours = cumulative[window_end + 1] - cumulative[slots + 1]
+        else:
+            # Count on the periodic price curve so windows longer than a day work
+            total = cumulative[-1]
+
+            def count_before(m: np.ndarray) -> np.ndarray:
+                return (m // n_slots) * total + cumulative[m % n_slots]
+
+            good_sell_hours = count_before(slots + look_ahead + 1) - count_before(slots + 1)
+
+        proactive_slot, proactive_amount = proactive_buying_amounts(
+            purchase, stats.mean_purchase, hours_to_next_spike, next_spike_price
+        )
+
+        arrays = (
+            next_spike_hour, hours_to_next_spike, next_spike_price, good_sell_hours,
+            proactive_slot, proactive_amount
+        )
+        for array in arrays:
+            array.flags.writeable = False
+        slot_rows = tuple(zip(
+            hours_to_next_spike.tolist(),
+            good_sell_hours.tolist(),
+            proactive_slot.tolist(),
+            proactive_amount.tolist()
+        ))
+        return cls(look_ahead_hours, *arrays, slot_rows=slot_rows)
+
+@dataclass(frozen=True, eq=False)
+class PriceTable:
+    """
+    Immutable grid price table backed by contiguous NumPy arrays.
+
+    Prices are indexed directly by slot, so a lookup is a plain array read
+    instead of building an hour-range string and going through DataFrame.loc.
+    A table is either a repeating daily profile (24 hourly or 96 quarter-hour
+    slots, start=None) or a dated series of any length starting at `start`.
+
+    Attributes:
+        purchase: Grid purchase price per slot
+        sale: Grid sale price per slot
+        labels: Optional slot labels, as found in grid_prices.csv
+        slot_minutes: Length of one slot in minutes (must divide an hour)
+        start: Start of the first slot for a dated series, None for a daily profile
+        stats: Price statistics over all slots, computed when the table is built
+            (the heuristic compares each slot against slot_stats instead)
+        version: Content hash identifying this set of prices
+
+    Derived data shared by the decision strategies (see PRICE_ARTEFACTS) is
+    built on first use through artefact() and kept with the table, so it is
+    computed once per price version.
+    """
+    purchase: np.ndarray
+    sale: np.ndarray
+    labels: Tuple[str, ...] = ()
+    slot_minutes: int = 60
+    start: Optional[datetime] = None
+    stats: PriceStats = field(init=False)
+    version: str = field(init=False)
+    _spike_contexts: Dict[int, SpikeContext] = field(init=False, repr=False)
+    _artefacts: Dict[str, Any] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        purchase = _frozen_prices(self.purchase)
+        sale = _frozen_prices(self.sale)
+        if purchase.ndim != 1 or purchase.shape != sale.shape or len(purchase) == 0:
+            raise ValueError("Purchase and sale prices must be non-empty 1-D arrays of equal length")
+        if self.slot_minutes <= 0 or 60 % self.slot_minutes != 0:
+            raise ValueError(f"Slot length must divide an hour, got {self.slot_minutes} minutes")
+        if self.start is None and len(purchase) * self.slot_minutes != 24 * 60:
+            raise ValueError(
+                f"A daily price profile with {self.slot_minutes}-minute slots needs "
+                f"{24 * 60 // self.slot_minutes} slots, got {len(purchase)}"
+            )
+
+        object.__setattr__(self, 'purchase', purchase)
+        object.__setattr__(self, 'sale', sale)
+        object.__setattr__(self, 'labels', tuple(self.labels))
+        object.__setattr__(self, 'stats', PriceStats.from_prices(purchase, sale))
+
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(purchase)
+        digest.update(sale)
+        digest.update(f"{self.slot_minutes}|{self.start.isoformat() if self.start else ''}".encode())
+        object.__setattr__(self, 'version', digest.hexdigest())
+        object.__setattr__(self, '_spike_contexts', {})
+        object.__setattr__(self, '_artefacts', {})
+
+    def __len__(self) -> int:
+        return len(self.purchase)
+
+    @cached_property
+    def slot_stats(self) -> SlotStats:
+        """Statistics of each slot's day, see SlotStats"""
+        return SlotStats.build(self)
+
+    @cached_property
+    def slot_prices(self) -> Tuple[Tuple[float, float], ...]:
+        """Per-slot (purchase, sale) prices as plain Python floats for scalar lookups"""
+        return tuple(zip(self.purchase.tolist(), self.sale.tolist()))
+
+    @property
+    def is_series(self) -> bool:
+        """True for a dated multi-day series, False for a repeating daily profile"""
+        return self.start is not None
+
+    @cached_property
+    def slots_per_hour(self) -> int:
+        return 60 // self.slot_minutes
+
+    def slot_for_hour(self, hour: int) -> int:
+        """
+        Slot index at the start of an hour. For a daily profile the hour wraps
+        around the day; for a dated series it counts hours from the series start.
+        """
+        slot = int(hour) * self.slots_per_hour
+        n_slots = len(self.purchase)
+        if self.start is None:
+            return slot % n_slots
+        if not 0 <= slot < n_slots:
+            raise ValueError(f"Hour {hour} is outside the loaded price series")
+        return slot
+
+    def slots_for_hours(self, hours: np.ndarray) -> np.ndarray:
+        """Vectorized slot_for_hour for an array of hours"""
+        slots = np.asarray(hours).astype(np.int64) * self.slots_per_hour
+        if not self.is_series:
+            return slots % len(self)
+        if np.any((slots < 0) | (slots >= len(self))):
+            raise ValueError("Some hours are outside the loaded price series")
+        return slots
+
+    def slot_at(self, when: datetime) -> int:
+        """Slot index containing a point in time"""
+        if not self.is_series:
+            minutes = when.hour * 60 + when.minute
+            return (minutes // self.slot_minutes) % len(self)
+        slot = (when - self.start) // timedelta(minutes=self.slot_minutes)
+        if not 0 <= slot < len(self):
+            raise ValueError(f"{when} is outside the loaded price series")
+        return slot
+
+    def spike_context(self, look_ahead_hours: int) -> SpikeContext:
+        """Get the look-ahead context for this table, building it on first use"""
+        context = self._spike_contexts.get(look_ahead_hours)
+        if context is None:
+            context = SpikeContext.build(self, look_ahead_hours)
+            self._spike_contexts[look_ahead_hours] = context
+        return context
+
+    def artefact(self, name: str) -> Any:
+        """Get a named price artefact (see PRICE_ARTEFACTS), building it on first use"""
+        if name not in self._artefacts:
+            self._artefacts[name] = PRICE_ARTEFACTS[name](self)
+        return self._artefacts[name]
+
+    @classmethod
+    def from_rows(
+        cls,
+        keys: Sequence[str],
+        purchase: Sequence[float],
+        sale: Sequence[float],
+        strict: bool = False
+    ) -> 'PriceTable':
+        """
+        Build a price table from rows of (key, purchase price, sale price).
+
+        Keys that are slot ranges ("00:00 - 01:00", "00:00 - 00:15", ...) give a
+        daily profile; missing slots fall back to default prices unless strict
+        is set. ISO timestamp keys give a dated series, which must be evenly
+        spaced.
+        """
+        if len(keys) == 0:
+            raise ValueError("Grid prices are empty")
+
+        first_key = str(keys[0]).strip()
+        if _SLOT_RANGE_PATTERN.match(first_key):
+            slot_minutes = _slot_range_minutes(first_key)
+            if slot_minutes <= 0 or 60 % slot_minutes != 0:
+                raise ValueError(f"Unsupported slot length in grid prices: {first_key}")
+            labels = [format_slot_range(i, slot_minutes) for i in range(24 * 60 // slot_minutes)]
+
+            rows: Dict[str, Tuple[float, float]] = {}
+            for key, purchase_price, sale_price in zip(keys, purchase, sale):
+                rows.setdefault(str(key).strip(), (float(purchase_price), float(sale_price)))
+
+            missing = [label for label in labels if label not in rows or any(map(math.isnan, rows[label]))]
+            if missing:
+                if strict:
+                    raise ValueError(f"Grid prices are missing slots: {', '.join(missing)}")
+                logger.error(f"Could not find price data for slots: {', '.join(missing)}")
+
+            # Default fallback values for missing slots
+            profile = [rows.get(label, (math.nan, math.nan)) for label in labels]
+            return cls(
+                purchase=[0.5 if math.isnan(p) else p for p, _ in profile],
+                sale=[0.25 if math.isnan(s) else s for _, s in profile],
+                labels=labels,
+                slot_minutes=slot_minutes
+            )
+
+        timestamps = [datetime.fromisoformat(str(key).strip()) for key in keys]
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        if len(order) < 2:
+            raise ValueError("A dated price series needs at least two slots")
+        step = timestamps[order[1]] - timestamps[order[0]]
+        if any(timestamps[b] - timestamps[a] != step for a, b in zip(order, order[1:])):
+            raise ValueError("Dated grid prices must be evenly spaced")
+        if step % timedelta(minutes=1):
+            raise ValueError(f"Unsupported slot length in grid prices: {step}")
+
+        return cls(
+            purchase=[purchase[i] for i in order],
+            sale=[sale[i] for i in order],
+            slot_minutes=step // timedelta(minutes=1),
+            start=timestamps[order[0]]
+        )
+
+    @classmethod
+    def from_dataframe(cls, grid_prices: 'pd.DataFrame', strict: bool = False) -> 'PriceTable':
+        """Build a price table from a DataFrame in the grid_prices.csv layout (pandas adapter)"""
+        return cls.from_rows(
+            [str(label) for label in grid_prices.index],
+            grid_prices['Purchase'].tolist(),
+            grid_prices['Sale'].tolist(),
+            strict=strict
+        )
+
+def _frozen_prices(values) -> np.ndarray:
+    """
+    Return values as a read-only float64 array so a table can be shared safely
+    between requests. Arrays that are already read-only (e.g. memory-mapped
+    snapshots) are used without copying.
+    """
+    prices = np.asarray(values, dtype=np.float64)
+    if prices.flags.writeable:
+        prices = prices.copy()
+        prices.flags.writeable = False
+    return prices
+
+def save_price_snapshot(table: PriceTable, path: str) -> None:
+    """
+    Write a price table to a binary snapshot that load_price_snapshot can
+    memory-map.
+
+    Layout: 8-byte magic, little-endian uint32 header length, JSON header padded
+    to a 64-byte boundary, then the purchase and sale prices as contiguous
+    little-endian float64 arrays. The file is written next to the target and
+    renamed into place, so a watcher never sees a partially written snapshot.
+    """
+    header = {
+        "format": _SNAPSHOT_FORMAT,
+        "slots": len(table),
+        "slot_minutes": table.slot_minutes,
+        "start": table.start.isoformat() if table.start is not None else None,
+        "dtype": "<f8",
+    }
+    header_bytes = json.dumps(header).encode()
+    prefix_length = len(_SNAPSHOT_MAGIC) + 4
+    padding = -(prefix_length + len(header_bytes)) % _SNAPSHOT_ALIGNMENT
+    header_bytes += b' ' * padding
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_SNAPSHOT_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(table.purchase.astype('<f8').tobytes())
+        f.write(table.sale.astype('<f8').tobytes())
+    os.replace(tmp_path, path)
+
+def load_price_snapshot(path: str) -> PriceTable:
+    """Memory-map a binary price snapshot written by save_price_snapshot"""
+    with open(path, 'rb') as f:
+        magic = f.read(len(_SNAPSHOT_MAGIC))
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a price snapshot")
+        (header_length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length))
+    if header.get("format") != _SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported price snapshot format: {header.get('format')}")
+
+    n_slots = header["slots"]
+    offset = len(_SNAPSHOT_MAGIC) + 4 + header_length
+    prices = np.memmap(path, dtype=header["dtype"], mode='r', offset=offset, shape=(2, n_slots))
+    slot_minutes = header["slot_minutes"]
+    start = datetime.fromisoformat(header["start"]) if header["start"] is not None else None
+    labels = [format_slot_range(i, slot_minutes) for i in range(n_slots)] if start is None else ()
+    return PriceTable(
+        purchase=prices[0],
+        sale=prices[1],
+        labels=labels,
+        slot_minutes=slot_minutes,
+        start=start
+    )
+
+def read_price_csv(path: str = GRID_PRICES_PATH, strict: bool = False) -> PriceTable:
+    """
+    Parse a grid prices CSV into a PriceTable with the csv module, without pandas.
+    The first column holds the slot range or timestamp; prices are read from the
+    Purchase and Sale columns.
+    """
+    def parse_price(row: Sequence[str], column: int) -> float:
+        value = row[column].strip() if column < len(row) else ''
+        return float(value) if value else math.nan
+
     try:
-        return pd.read_csv('grid_prices.csv', index_col=0)
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            if 'Purchase' not in header or 'Sale' not in header:
+                raise ValueError(f"{path} must have Purchase and Sale columns")
+            purchase_column = header.index('Purchase')
+            sale_column = header.index('Sale')
+
+            keys, purchase, sale = [], [], []
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                keys.append(row[0])
+                purchase.append(parse_price(row, purchase_column))
+                sale.append(parse_price(row, sale_column))
     except FileNotFoundError:
-        logger.error("grid_prices.csv not found in the project root directory")
-        raise FileNotFoundError("grid_prices.csv not found. Please ensure it exists in the project root.")
+        logger.error(f"{path} not found in the project root directory")
+        raise FileNotFoundError(f"{path} not found. Please ensure it exists in the project root.")
     except Exception as e:
         logger.error(f"Error loading grid prices: {str(e)}")
         raise
 
+    return PriceTable.from_rows(keys, purchase, sale, strict=strict)
+
+def load_price_table(path: str = GRID_PRICES_PATH, strict: bool = False) -> PriceTable:
+    """Load grid prices from a CSV file or a binary snapshot into a PriceTable"""
+    if path.endswith(PRICE_SNAPSHOT_SUFFIX):
+        return load_price_snapshot(path)
+    return read_price_csv(path, strict=strict)
+
+def as_price_table(grid_prices: Union[PriceTable, 'pd.DataFrame']) -> PriceTable:
+    """Return grid_prices as a PriceTable, converting a DataFrame if needed"""
+    if isinstance(grid_prices, PriceTable):
+        return grid_prices
+    return PriceTable.from_dataframe(grid_prices)
+
+def validate_price_table(table: PriceTable) -> None:
+    """Raise ValueError if a price table is not safe to make active"""
+    if not (np.all(np.isfinite(table.purchase)) and np.all(np.isfinite(table.sale))):
+        raise ValueError("Grid prices contain missing or non-numeric values")
+    if table.stats.mean_purchase <= 0 or np.any(table.slot_stats.mean_purchase <= 0):
+        raise ValueError("Mean grid purchase price must be positive (on every day of a series)")
+
+def _capped_sale_prices(prices: PriceTable) -> np.ndarray:
+    """Sale prices capped at the purchase price, as used by the storage planners"""
+    capped = np.minimum(prices.sale, prices.purchase)
+    capped.flags.writeable = False
+    return capped
+
+# Price artefacts decision strategies can declare: name -> builder, called once per price table
+PRICE_ARTEFACTS: Dict[str, Callable[[PriceTable], Any]] = {
+    "stats": lambda prices: prices.stats,
+    "slot_stats": lambda prices: prices.slot_stats,
+    "slot_prices": lambda prices: prices.slot_prices,
+    "spike_context": lambda prices: prices.spike_context(24),
+    "capped_sale": _capped_sale_prices,
+}
+
+def register_price_artefact(name: str, build: Callable[[PriceTable], Any]) -> None:
+    """Make a new price artefact available to PriceTable.artefact"""
+    PRICE_ARTEFACTS[name] = build
+
+class PriceTableCache:
+    """
+    Process-wide cache for the grid price table.
+
+    The price file is parsed once and the same immutable PriceTable is handed
+    to every caller. refresh() reloads the file when its mtime or size changes;
+    the new table is parsed and validated before being swapped in with a single
+    reference assignment, so readers never see a half-loaded table. current()
+    never touches the disk once a table is active.
+    """
+
+    def __init__(self, path: str = GRID_PRICES_PATH):
+        self.path = path
+        # (table, file signature) of the active table, swapped as one reference
+        self._state: Optional[Tuple[PriceTable, Tuple[int, int]]] = None
+        self._failed_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+        # Counters used to confirm that disk reads stay out of the hot path
+        self.hits = 0
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_load_seconds = 0.0
+        self.total_load_seconds = 0.0
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version of the active price table (None until one is loaded)"""
+        state = self._state
+        return state[0].version if state is not None else None
+
+    def refresh(self) -> bool:
+        """
+        Reload the price file if it changed since the active table was loaded.
+
+        Returns:
+            bool: True if a new table was swapped in
+        """
+        signature = self._file_signature()
+        state = self._state
+
+        # Keep serving the last good table if the file is temporarily missing
+        if state is not None and (signature is None or signature == state[1]):
+            return False
+        if signature is not None and signature == self._failed_signature:
+            return False
+
+        with self._lock:
+            # Another caller may have reloaded while we waited for the lock
+            state = self._state
+            if state is not None and state[1] == signature:
+                return False
+
+            start = time.perf_counter()
+            try:
+                # Only a replacement for a good table is held to strict validation;
+                # the first load fills missing slots with default prices as before
+                table = load_price_table(self.path, strict=state is not None)
+                validate_price_table(table)
+            except Exception as e:
+                if state is None:
+                    # Don't re-parse the same broken file on every request
+                    self.failed_reloads += 1
+                    self._failed_signature = signature
+                    raise
+                # Keep the previous table active until the file is fixed
+                self.failed_reloads += 1
+                self._failed_signature = signature
+                logger.error(
+                    f"Rejected new grid prices from {self.path}: {str(e)} "
+                    f"(keeping version {state[0].version})"
+                )
+                return False
+            elapsed = time.perf_counter() - start
+
+            self._state = (table, signature)
+            self._failed_signature = None
+            self.reloads += 1
+            self.last_load_seconds = elapsed
+            self.total_load_seconds += elapsed
+            logger.info(
+                f"Loaded grid prices from {self.path} in {elapsed * 1000:.2f} ms "
+                f"(version {table.version})"
+            )
+            return True
+
+    def current(self) -> PriceTable:
+        """Return the active price table, only loading it if none is active yet"""
+        state = self._state
+        if state is None:
+            self.refresh()
+            state = self._state
+            if state is None:
+                raise ValueError(f"No valid grid prices loaded from {self.path}")
+        self.hits += 1
+        return state[0]
+
+    def get(self) -> PriceTable:
+        """Return the cached price table, reloading it if the file has changed"""
+        self.refresh()
+        return self.current()
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache counters (hits, reloads and load times in seconds)"""
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_load_seconds": self.last_load_seconds,
+            "total_load_seconds": self.total_load_seconds,
+        }
+
+class PriceCatalog:
+    """
+    Price tables for many tariffs, keyed by tariff id.
+
+    Each tariff is a price file in one directory, named <tariff_id>.prices
+    (binary snapshot) or <tariff_id>.csv. Tariffs are loaded on first use and
+    kept in a bounded LRU: once more than max_tariffs are loaded, the least
+    recently used one is evicted and will be re-read on its next use.
+    """
+
+    def __init__(self, directory: str, max_tariffs: int = 256):
+        self.directory = directory
+        self.max_tariffs = max_tariffs
+        self._entries: "OrderedDict[str, PriceTableCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _path_for(self, tariff_id: str) -> str:
+        if not _TARIFF_ID_PATTERN.match(tariff_id):
+            raise KeyError(f"Invalid tariff id: {tariff_id}")
+        for suffix in (PRICE_SNAPSHOT_SUFFIX, '.csv'):
+            path = os.path.join(self.directory, tariff_id + suffix)
+            if os.path.exists(path):
+                return path
+        raise KeyError(f"No price file for tariff {tariff_id} in {self.directory}")
+
+    def peek(self, tariff_id: str) -> Optional[PriceTable]:
+        """Return a tariff's table if it is already loaded, without touching the disk"""
+        with self._lock:
+            entry = self._entries.get(tariff_id)
+            if entry is None or entry.version is None:
+                return None
+            self._entries.move_to_end(tariff_id)
+            self.hits += 1
+        return entry.current()
+
+    def get(self, tariff_id: str) -> PriceTable:
+        """Return a tariff's table, loading it from disk on first use"""
+        table = self.peek(tariff_id)
+        if table is not None:
+            return table
+
+        path = self._path_for(tariff_id)
+        with self._lock:
+            # Another caller may have added the same tariff in the meantime
+            entry = self._entries.get(tariff_id)
+            if entry is None:
+                # Kept even if its first load fails, so it remembers a broken
+                # file and parses it again only once the file changes
+                entry = PriceTableCache(path)
+                self._entries[tariff_id] = entry
+                self.loads += 1
+                while len(self._entries) > self.max_tariffs:
+                    evicted_id, _ = self._entries.popitem(last=False)
+                    self.evictions += 1
+                    logger.debug(f"Evicted tariff {evicted_id} from the price catalog")
+            else:
+                self._entries.move_to_end(tariff_id)
+        return entry.current()
+
+    def refresh(self) -> int:
+        """Reload loaded tariffs whose files changed; returns the number reloaded"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return sum(entry.refresh() for entry in entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Return catalog counters"""
+        return {
+            "loaded": len(self._entries),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+# Shared cache used by the agents
+price_table_cache = PriceTableCache()
+
+def get_grid_prices() -> PriceTable:
+    """Get the active grid price table without touching the disk"""
+    return price_table_cache.current()
+
 def parse_hour_range_from_int(hour: int) -> str:
     """Convert an hour integer (0-23) to the string format used in the grid_prices.csv"""
     hour = int(hour) % 24  # Ensure it's an int and handle overflow
@@ -26,8 +780,26 @@ def parse_hour_range_from_int(hour: int) -> str:
     end = f"{end_hour:02d}:00"
     return f"{start} - {end}"  # Format matches the CSV index
 
-def get_grid_prices_for_hour(grid_prices: pd.DataFrame, hour: int) -> Dict[str, float]:
+def format_slot_range(slot: int, slot_minutes: int) -> str:
+    """Convert a slot index of a daily profile to its "HH:MM - HH:MM" label"""
+    start = (slot * slot_minutes) % (24 * 60)
+    end = (start + slot_minutes) % (24 * 60)
+    return f"{start // 60:02d}:{start % 60:02d} - {end // 60:02d}:{end % 60:02d}"
+
+def _slot_range_minutes(label: str) -> int:
+    """Length in minutes of a "HH:MM - HH:MM" slot label"""
+    h1, m1, h2, m2 = (int(part) for part in _SLOT_RANGE_PATTERN.match(label).groups())
+    return ((h2 * 60 + m2) - (h1 * 60 + m1)) % (24 * 60)
+
+def get_grid_prices_for_hour(grid_prices: Union[PriceTable, 'pd.DataFrame'], hour: int) -> Dict[str, float]:
     """Get grid purchase and sale prices for a specific hour"""
+    if isinstance(grid_prices, PriceTable):
+        purchase, sale = grid_prices.slot_prices[grid_prices.slot_for_hour(hour)]
+        return {
+            "purchase": purchase,
+            "sale": sale
+        }
+
     hour_range = parse_hour_range_from_int(hour)
     try:
         return {
@@ -44,11 +816,12 @@ def decide_energy_distribution(
     consumption: float,
     current_storage: float,
     max_storage: float,
-    grid_prices: pd.DataFrame,
+    grid_prices: Union[PriceTable, 'pd.DataFrame'],
     hour: int,
     p2p_price: float,
     look_ahead_hours: int = 24,  # Extended to look at full day
-    enable_proactive_buying: bool = True  # New parameter to enable/disable proactive buying
+    enable_proactive_buying: bool = True,  # New parameter to enable/disable proactive buying
+    slot: Optional[int] = None
 ) -> Tuple[float, float, float, float]:
     """
     Make a comprehensive decision about energy distribution with P2P price considerations
@@ -59,11 +832,13 @@ def decide_energy_distribution(
         consumption: Energy consumed in the current hour (kWh)
         current_storage: Current energy in storage (kWh)
         max_storage: Maximum storage capacity (kWh)
-        grid_prices: DataFrame containing grid prices
+        grid_prices: PriceTable (or DataFrame) containing grid prices
         hour: Current hour (0-23)
         p2p_price: Current peer-to-peer trading price
         look_ahead_hours: Number of hours to look ahead for price forecasting
         enable_proactive_buying: Flag to enable proactive buying before price spikes
+        slot: Price slot to decide for (e.g. from PriceTable.slot_at); overrides hour
+              for sub-hourly and multi-day price tables
         
     Returns:
         Tuple of:
@@ -71,52 +846,42 @@ def decide_energy_distribution(
         - sell_to_grid: Energy to sell to grid (kWh)
         - buy_from_grid: Energy to buy from grid (kWh)
         - take_from_storage: Energy to take from storage (kWh)
+        Arrays of households are dispatched to decide_energy_distribution_batch
+        and return arrays.
     """
     
-    # Get current hour prices
-    current_prices = get_grid_prices_for_hour(grid_prices, hour)
-    grid_purchase_price = current_prices["purchase"]
-    grid_sale_price = current_prices["sale"]
-    
-    # Get all 24 hours of price data for better analysis
-    all_hours = list(range(24))
-    all_prices = [get_grid_prices_for_hour(grid_prices, h) for h in all_hours]
-    all_purchase_prices = [p["purchase"] for p in all_prices]
-    all_sale_prices = [p["sale"] for p in all_prices]
-    
-    # Calculate price statistics
-    mean_purchase_price = np.mean(all_purchase_prices)
-    std_purchase_price = np.std(all_purchase_prices)
-    mean_sale_price = np.mean(all_sale_prices)
+    if (isinstance(production, np.ndarray) or isinstance(consumption, np.ndarray) or
+            isinstance(current_storage, np.ndarray) or isinstance(max_storage, np.ndarray) or
+            isinstance(hour, np.ndarray) or isinstance(p2p_price, np.ndarray) or
+            isinstance(slot, np.ndarray)):
+        from src.decisions.batch import decide_energy_distribution_batch
+        return decide_energy_distribution_batch(
+            production, consumption, current_storage, max_storage, grid_prices, hour, p2p_price,
+            look_ahead_hours, enable_proactive_buying, slot
+        )
     
-    # Define price spike thresholds (purchase price > mean + 1 std dev)
-    purchase_spike_threshold = mean_purchase_price + std_purchase_price
+    # Scalar fast path: everything below works on plain Python floats read from
+    # precomputed per-slot tables, avoiding NumPy dispatch on single values
+    production = float(production)
+    consumption = float(consumption)
+    current_storage = float(current_storage)
+    max_storage = float(max_storage)
+    p2p_price = float(p2p_price)
     
-    # Look ahead to detect upcoming price spikes
-    upcoming_hours = [(hour + i) % 24 for i in range(1, look_ahead_hours + 1)]
-    upcoming_prices = [get_grid_prices_for_hour(grid_prices, h) for h in upcoming_hours]
+    prices = as_price_table(grid_prices)
+    if slot is None:
+        slot = prices.slot_for_hour(hour)
     
-    # Identify upcoming price spikes within the look-ahead window
-    upcoming_spikes = []
-    for i, price_data in enumerate(upcoming_prices):
-        if price_data["purchase"] > purchase_spike_threshold:
-            upcoming_spikes.append({
-                "hour": upcoming_hours[i],
-                "price": price_data["purchase"],
-                "hours_away": i + 1
-            })
+    # Get current hour prices
+    grid_purchase_price, grid_sale_price = prices.slot_prices[slot]
     
-    # Calculate hours until the next price spike
-    hours_to_next_spike = float('inf')
-    if upcoming_spikes:
-        hours_to_next_spike = upcoming_spikes[0]["hours_away"]
+    # Price statistics of the slot's day are precomputed once per price table
+    mean_purchase_price, purchase_spike_threshold = prices.slot_stats.slot_rows[slot]
     
-    # Calculate optimal sell hours (when grid sale price is high)
-    high_sale_price_threshold = np.percentile(all_sale_prices, 75)
-    upcoming_good_sell_hours = [
-        h for i, h in enumerate(upcoming_hours) 
-        if all_prices[h]["sale"] > high_sale_price_threshold
-    ]
+    # Upcoming price spikes, good sell hours (when grid sale price is high) and
+    # the price part of proactive buying are precomputed per slot as well
+    spike_context = prices.spike_context(look_ahead_hours)
+    hours_to_next_spike, upcoming_good_sell_hours, proactive_slot, proactive_amount = spike_context.slot_rows[slot]
     
     # Calculate energy balance
     energy_balance = production - consumption  # Positive = surplus, Negative = deficit
@@ -134,9 +899,9 @@ def decide_energy_distribution(
         
         # Calculate storage urgency factor based on proximity to next price spike
         # Higher urgency means we prioritize storage more
-        if hours_to_next_spike < float('inf'):
+        if hours_to_next_spike < math.inf:
             # Exponential decay function: urgency increases as we get closer to spike
-            storage_urgency = np.exp(-0.1 * hours_to_next_spike) 
+            storage_urgency = math.exp(-0.1 * hours_to_next_spike)
         else:
             storage_urgency = 0.1  # Base storage urgency when no spikes detected
         
@@ -151,7 +916,7 @@ def decide_energy_distribution(
         should_prioritize_storage = (
             (storage_deficit > 0 and hours_to_next_spike < 12) or  # Spike approaching
             is_p2p_price_competitive or                            # P2P price is good
-            (len(upcoming_good_sell_hours) > 0 and storage_deficit > 0)  # Good sell opportunity coming
+            (upcoming_good_sell_hours > 0 and storage_deficit > 0)  # Good sell opportunity coming
         )
         
         if should_prioritize_storage and storage_capacity_left > 0:
@@ -202,18 +967,18 @@ def decide_energy_distribution(
                 energy_to_storage += extra_buy
                 buy_from_grid += extra_buy
     
-    # Apply proactive buying strategy if enabled
-    if enable_proactive_buying:
-        extra_grid_buy, extra_storage = calculate_proactive_buying(
-            current_storage, 
-            max_storage, 
-            grid_purchase_price, 
-            mean_purchase_price, 
-            upcoming_spikes, 
-            energy_to_storage
-        )
-        buy_from_grid += extra_grid_buy
-        energy_to_storage += extra_storage
+    # Apply proactive buying strategy if enabled (see calculate_proactive_buying);
+    # only the storage terms are left to evaluate per request
+    if enable_proactive_buying and proactive_slot:
+        available_storage = max_storage - current_storage - energy_to_storage
+        
+        # If storage is already full or nearly full, don't buy more
+        if not available_storage < 1.0:
+            capacity_factor = min(1.0, available_storage / 20.0)
+            extra_energy = min(proactive_amount * capacity_factor, available_storage)
+            extra_energy = min(extra_energy, available_storage * 0.5)
+            buy_from_grid += extra_energy
+            energy_to_storage += extra_energy
     
     # Ensure we don't have negative values (safety check)
     energy_to_storage = max(0, energy_to_storage)
@@ -260,76 +1025,98 @@ def calculate_proactive_buying(
     if available_storage < 1.0:  # Threshold of 1 kWh
         return 0.0, 0.0
     
-    # Calculate price advantage: how much cheaper current price is vs mean
-    price_advantage = mean_price - current_price
-    price_advantage_ratio = price_advantage / mean_price
-    
-    # Only buy if there's a significant price advantage
-    if price_advantage_ratio <= 0.05:  # At least 5% cheaper than mean
-        return 0.0, 0.0
-    
-    # Get the first upcoming spike information
+    # Price advantage, spike severity and timing of the first upcoming spike
     next_spike = upcoming_spikes[0]
-    hours_to_spike = next_spike["hours_away"]
-    spike_price = next_spike["price"]
-    
-    # Calculate the price difference between spike and current price
-    spike_to_current_ratio = spike_price / current_price
-    
-    # Calculate buying aggressiveness based on:
-    # 1. How soon the spike will occur
-    # 2. How severe the spike is compared to current price
-    # 3. Current price advantage compared to mean
-    
-    # Time factor: more aggressive as spike approaches, but not too close
-    # Optimal buying window is between 2-12 hours before spike
-    if hours_to_spike < 2 or hours_to_spike > 12:
-        time_factor = 0.3
-    else:
-        # Peaked at middle of window (around 7 hours before spike)
-        time_factor = 1.0 - abs(hours_to_spike - 7) / 5
-    
-    # Price advantage factor: more aggressive with larger advantage
-    price_factor = min(1.0, spike_to_current_ratio / 2)
-    
-    # Combine factors to determine buying aggressiveness (0-1 scale)
-    buying_factor = time_factor * price_factor * price_advantage_ratio
-    
-    # Calculate base amount to buy - more aggressive as price advantage increases
-    # and as spike approaches within optimal window
-    base_amount = 5.0  # Base amount in kWh
-    scaled_amount = base_amount * buying_factor * spike_to_current_ratio
+    proactive_slot, proactive_amount = proactive_buying_amounts(
+        np.float64(current_price), mean_price, np.float64(next_spike["hours_away"]), np.float64(next_spike["price"])
+    )
+    if not proactive_slot:
+        return 0.0, 0.0
     
     # Scale based on storage capacity
     capacity_factor = min(1.0, available_storage / 20.0)  # Scale up to 20 kWh
     
     # Calculate the final amount to buy
-    extra_energy = min(scaled_amount * capacity_factor, available_storage)
+    extra_energy = min(float(proactive_amount) * capacity_factor, available_storage)
     
     # Safety limit - cap at 50% of available storage in one go
     extra_energy = min(extra_energy, available_storage * 0.5)
     
     return extra_energy, extra_energy
 
+def proactive_buying_amounts(
+    current_price: np.ndarray,
+    mean_price: float,
+    hours_to_spike: np.ndarray,
+    spike_price: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Price-dependent part of calculate_proactive_buying, for arrays of slots.
+
+    Everything in the proactive buying rule except the storage terms depends
+    only on the slot's prices and the next spike, so it can be computed once
+    per price table.
+
+    Returns:
+        Tuple of:
+        - proactive_slot: True where a spike is coming and the current price
+          is at least 5% below the mean
+        - proactive_amount: Amount to buy before the storage capacity factor
+          and limits are applied (kWh), 0 where proactive_slot is False
+    """
+    price_advantage = mean_price - current_price
+    price_advantage_ratio = price_advantage / mean_price
+    proactive_slot = (hours_to_spike != np.inf) & ~(price_advantage_ratio <= 0.05)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spike_to_current_ratio = spike_price / current_price
+
+        # Optimal buying window is between 2-12 hours before spike, peaked around 7 hours
+        time_factor = np.where(
+            (hours_to_spike < 2) | (hours_to_spike > 12),
+            0.3,
+            1.0 - np.abs(hours_to_spike - 7) / 5
+        )
+        price_factor = np.minimum(1.0, spike_to_current_ratio / 2)
+        buying_factor = time_factor * price_factor * price_advantage_ratio
+
+        base_amount = 5.0
+        scaled_amount = base_amount * buying_factor * spike_to_current_ratio
+
+    return proactive_slot, np.where(proactive_slot, scaled_amount, 0.0)
+
 def calculate_cost(
     buy_from_grid: float,
     sell_to_grid: float,
     sell_to_p2p: float,
     take_from_storage: float,
-    grid_prices: pd.DataFrame,
+    grid_prices: Union[PriceTable, 'pd.DataFrame'],
     hour: int,
-    p2p_price: float
+    p2p_price: float,
+    slot: Optional[int] = None
 ) -> float:
     """
     Calculate the net cost of energy decisions
     
     Returns:
-        float: Net cost (positive) or profit (negative)
+        float: Net cost (positive) or profit (negative); arrays of decisions are
+        dispatched to calculate_cost_batch and return an array
     """
-    # Get prices for the current hour
-    current_prices = get_grid_prices_for_hour(grid_prices, hour)
-    buy_price = current_prices["purchase"]
-    sell_price = current_prices["sale"]
+    if (isinstance(buy_from_grid, np.ndarray) or isinstance(sell_to_grid, np.ndarray) or
+            isinstance(sell_to_p2p, np.ndarray) or isinstance(hour, np.ndarray) or
+            isinstance(p2p_price, np.ndarray) or isinstance(slot, np.ndarray)):
+        from src.decisions.batch import calculate_cost_batch
+        return calculate_cost_batch(
+            buy_from_grid, sell_to_grid, sell_to_p2p, take_from_storage, grid_prices, hour, p2p_price, slot
+        )
+    
+    # Get prices for the current hour (or the given slot of a PriceTable)
+    if slot is not None:
+        buy_price, sell_price = as_price_table(grid_prices).slot_prices[slot]
+    else:
+        current_prices = get_grid_prices_for_hour(grid_prices, hour)
+        buy_price = current_prices["purchase"]
+        sell_price = current_prices["sale"]
     
     # Calculate costs and revenues
     grid_purchase_cost = buy_from_grid * buy_price
@@ -0,0 +1,49 @@
+from typing import List, Optional
+
+from uagents import Model
+
+
+class CostQuery(Model):
+    household_ids: Optional[List[str]] = None  # None for all households
+
+
+class HouseholdCost(Model):
+    household_id: str
+    cost: float
+    no_battery_cost: float
+    savings: float
+    bought_from_grid: float
+    sold_to_grid: float
+    stored: float
+    taken_from_storage: float
+    decisions: int
+    
+    def __str__(self):
+        return (f"HouseholdCost:\n"
+                f"  Household: {self.household_id}\n"
+                f"  Cost: {self.cost:.2f}\n"
+                f"  No-battery Cost: {self.no_battery_cost:.2f}\n"
+                f"  Savings: {self.savings:.2f}\n"
+                f"  Bought from Grid: {self.bought_from_grid} kWh\n"
+                f"  Sold to Grid: {self.sold_to_grid} kWh\n"
+                f"  Stored: {self.stored} kWh\n"
+                f"  Taken from Storage: {self.taken_from_storage} kWh\n"
+                f"  Decisions: {self.decisions}")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+class CostReport(Model):
+    households: List[HouseholdCost]
+    total_cost: float
+    total_savings: float
+    
+    def __str__(self):
+        return (f"CostReport:\n"
+                f"  Households: {len(self.households)}\n"
+                f"  Total Cost: {self.total_cost:.2f}\n"
+                f"  Total Savings: {self.total_savings:.2f}")
+    
+    def __repr__(self):
+        return self.__str__()
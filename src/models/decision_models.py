@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import List, Optional
+
 from uagents import Model
 
 
@@ -10,6 +13,12 @@ class DecisionInput(Model):
     grid_sale_price: float
     p2p_base_price: float
     token_balance: float
+    timestamp: Optional[datetime] = None  # Selects the price slot for sub-hourly / multi-day prices
+    tariff_id: Optional[str] = None  # Tariff price file to use instead of grid_prices.csv
+    strategy: Optional[str] = None  # "heuristic" (default), "policy", "dp", "lp" or "mpc"
+    household_id: Optional[str] = None  # Identifies the household across requests (MPC plans, cost totals)
+    production_forecast: Optional[List[float]] = None  # kWh per slot from the current one on
+    consumption_forecast: Optional[List[float]] = None  # kWh per slot from the current one on
     
     def __str__(self):
         storage_str = '\n    '.join([f"{name}: {level}" for name, level in self.storage_levels.items()])
@@ -21,7 +30,11 @@ class DecisionInput(Model):
                 f"  Grid Purchase Price: {self.grid_purchase_price}\n"
                 f"  Grid Sale Price: {self.grid_sale_price}\n"
                 f"  P2P Base Price: {self.p2p_base_price}\n"
-                f"  Token Balance: {self.token_balance}")
+                f"  Token Balance: {self.token_balance}\n"
+                f"  Timestamp: {self.timestamp}\n"
+                f"  Tariff: {self.tariff_id}\n"
+                f"  Strategy: {self.strategy}\n"
+                f"  Household: {self.household_id}")
     
     def __repr__(self):
         return self.__str__()
@@ -41,4 +54,60 @@ class DecisionOutput(Model):
                 f"  Energy Bought from Grid: {self.energy_bought_from_grid} kWh")
     
     def __repr__(self):
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
+
+
+class DecisionColumns(Model):
+    """Decision inputs of many households as columns, one entry per household"""
+    hour: List[int]
+    production: List[float]
+    consumption: List[float]
+    storage_level: List[float]  # Energy in all of the household's storages
+    storage_capacity: List[float]  # Capacity of all of the household's storages
+    p2p_base_price: List[float]
+    timestamp: Optional[List[Optional[datetime]]] = None
+    tariff_id: Optional[List[Optional[str]]] = None
+    household_id: Optional[List[Optional[str]]] = None
+    strategy: Optional[str] = None  # Shared by all households
+    
+    def __str__(self):
+        return (f"DecisionColumns:\n"
+                f"  Households: {len(self.production)}\n"
+                f"  Strategy: {self.strategy}")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+class DecisionBatchInput(Model):
+    """Either a list of DecisionInputs or the same inputs as columns"""
+    inputs: Optional[List[DecisionInput]] = None
+    columns: Optional[DecisionColumns] = None
+    
+    def __str__(self):
+        households = len(self.inputs) if self.inputs is not None else len(self.columns.production) if self.columns else 0
+        return (f"DecisionBatchInput:\n"
+                f"  Households: {households}\n"
+                f"  Columnar: {self.columns is not None}")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+class DecisionBatchOutput(Model):
+    """Decisions in the shape they were asked for: outputs for inputs, the column lists for columns"""
+    outputs: Optional[List[DecisionOutput]] = None
+    energy_added_to_storage: Optional[List[float]] = None
+    energy_sold_to_grid: Optional[List[float]] = None
+    energy_bought_from_storages: Optional[List[float]] = None
+    energy_bought_from_grid: Optional[List[float]] = None
+    failed: List[int] = []  # Households (by position) that got the fallback decision (buy all consumption from the grid)
+    
+    def __str__(self):
+        households = len(self.outputs) if self.outputs is not None else len(self.energy_added_to_storage or [])
+        return (f"DecisionBatchOutput:\n"
+                f"  Households: {households}\n"
+                f"  Failed: {len(self.failed)}")
+    
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,160 @@
+from typing import Optional
+
+from uagents import Model
+
+
+class PriceMetrics(Model):
+    version: Optional[str]
+    hits: int
+    reloads: int
+    failed_reloads: int
+    last_load_seconds: float
+    total_load_seconds: float
+    
+    def __str__(self):
+        return (f"PriceMetrics:\n"
+                f"  Version: {self.version}\n"
+                f"  Hits: {self.hits}\n"
+                f"  Reloads: {self.reloads}\n"
+                f"  Failed Reloads: {self.failed_reloads}\n"
+                f"  Last Load: {self.last_load_seconds * 1000:.2f} ms\n"
+                f"  Total Load: {self.total_load_seconds * 1000:.2f} ms")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+
+class TariffMetrics(Model):
+    loaded: int
+    hits: int
+    loads: int
+    evictions: int
+    
+    def __str__(self):
+        return (f"TariffMetrics:\n"
+                f"  Loaded: {self.loaded}\n"
+                f"  Hits: {self.hits}\n"
+                f"  Loads: {self.loads}\n"
+                f"  Evictions: {self.evictions}")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+
+class DecisionCacheMetrics(Model):
+    enabled: bool
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    
+    def __str__(self):
+        return (f"DecisionCacheMetrics:\n"
+                f"  Enabled: {self.enabled}\n"
+                f"  Size: {self.size}\n"
+                f"  Hits: {self.hits}\n"
+                f"  Misses: {self.misses}\n"
+                f"  Evictions: {self.evictions}")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+
+class MPCMetrics(Model):
+    households: int
+    plan_hits: int
+    replans: int
+    evictions: int
+    
+    def __str__(self):
+        return (f"MPCMetrics:\n"
+                f"  Households: {self.households}\n"
+                f"  Plan Hits: {self.plan_hits}\n"
+                f"  Replans: {self.replans}\n"
+                f"  Evictions: {self.evictions}")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+
+class PolicyMetrics(Model):
+    policies: int
+    queued: int
+    hits: int
+    fallbacks: int
+    refused: int
+    compiles: int
+    last_compile_seconds: float
+    max_error: float
+    
+    def __str__(self):
+        return (f"PolicyMetrics:\n"
+                f"  Policies: {self.policies}\n"
+                f"  Queued: {self.queued}\n"
+                f"  Hits: {self.hits}\n"
+                f"  Fallbacks: {self.fallbacks}\n"
+                f"  Refused: {self.refused}\n"
+                f"  Compiles: {self.compiles}\n"
+                f"  Last Compile: {self.last_compile_seconds:.3f}s\n"
+                f"  Max Error: {self.max_error:.4f} kWh")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+class ExecutorMetrics(Model):
+    mode: str
+    workers: int
+    submitted: int
+    completed: int
+    failed: int
+    in_flight: int
+    tables_sent: int
+    mean_queue_ms: float
+    max_queue_ms: float
+    mean_compute_ms: float
+    max_compute_ms: float
+    
+    def __str__(self):
+        return (f"ExecutorMetrics:\n"
+                f"  Mode: {self.mode}\n"
+                f"  Workers: {self.workers}\n"
+                f"  Submitted: {self.submitted}\n"
+                f"  Completed: {self.completed}\n"
+                f"  Failed: {self.failed}\n"
+                f"  In Flight: {self.in_flight}\n"
+                f"  Tables Sent: {self.tables_sent}\n"
+                f"  Queue Wait: {self.mean_queue_ms:.3f} ms mean, {self.max_queue_ms:.3f} ms max\n"
+                f"  Compute: {self.mean_compute_ms:.3f} ms mean, {self.max_compute_ms:.3f} ms max")
+    
+    def __repr__(self):
+        return self.__str__()
+
+
+class StreamMetrics(Model):
+    listening: bool
+    connections: int
+    open_connections: int
+    inputs: int
+    outputs: int
+    errors: int
+    batches: int
+    mean_batch_size: float
+    reader_waits: int
+    
+    def __str__(self):
+        return (f"StreamMetrics:\n"
+                f"  Listening: {self.listening}\n"
+                f"  Connections: {self.connections} ({self.open_connections} open)\n"
+                f"  Inputs: {self.inputs}\n"
+                f"  Outputs: {self.outputs}\n"
+                f"  Errors: {self.errors}\n"
+                f"  Batches: {self.batches} (mean size {self.mean_batch_size:.1f})\n"
+                f"  Reader Waits: {self.reader_waits}")
+    
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,40 @@
+"""
+Convert a grid prices CSV into a binary snapshot that the agent memory-maps.
+
+Usage:
+    python -m src.tools.convert_prices grid_prices.csv [grid_prices.prices]
+"""
+import argparse
+import os
+import time
+
+from src.decisions.trading import PRICE_SNAPSHOT_SUFFIX, load_price_table, load_price_snapshot, save_price_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert grid prices CSV to a binary snapshot")
+    parser.add_argument("source", help="Grid prices CSV (daily profile or dated series)")
+    parser.add_argument("target", nargs="?", help=f"Snapshot path (default: source with {PRICE_SNAPSHOT_SUFFIX})")
+    args = parser.parse_args()
+
+    target = args.target or os.path.splitext(args.source)[0] + PRICE_SNAPSHOT_SUFFIX
+
+    start = time.perf_counter()
+    table = load_price_table(args.source, strict=True)
+    parse_seconds = time.perf_counter() - start
+
+    save_price_snapshot(table, target)
+
+    start = time.perf_counter()
+    snapshot = load_price_snapshot(target)
+    load_seconds = time.perf_counter() - start
+
+    if snapshot.version != table.version:
+        raise RuntimeError(f"Snapshot {target} does not match {args.source}")
+
+    print(f"Wrote {len(table)} slots ({table.slot_minutes}-minute) to {target}, version {table.version}")
+    print(f"CSV parse: {parse_seconds * 1000:.2f} ms, snapshot load: {load_seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
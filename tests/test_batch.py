@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.decisions.batch import calculate_cost_batch, decide_energy_distribution_batch
+from src.decisions.trading import PriceTable, calculate_cost, decide_energy_distribution, read_price_csv
+
+
+def _tables():
+    hourly = read_price_csv()
+    quarter_hourly = PriceTable(np.repeat(hourly.purchase, 4), np.repeat(hourly.sale, 4), slot_minutes=15)
+    series = PriceTable(
+        np.concatenate((hourly.purchase, hourly.purchase * 2, hourly.purchase)),
+        np.concatenate((hourly.sale, hourly.sale * 2, hourly.sale)),
+        start=datetime(2025, 1, 1)
+    )
+    return [hourly, quarter_hourly, series]
+
+
+@pytest.mark.parametrize("prices", _tables(), ids=["hourly", "15min", "series"])
+@pytest.mark.parametrize("enable_proactive_buying", [True, False])
+@pytest.mark.parametrize("look_ahead_hours", [6, 24])
+def test_batch_matches_scalar(prices, enable_proactive_buying, look_ahead_hours):
+    rng = np.random.default_rng(0)
+    n = 2000
+    production = rng.uniform(0, 5, n)
+    consumption = rng.uniform(0, 5, n)
+    max_storage = rng.choice([0.0, 5.0, 13.5], n)
+    current_storage = rng.uniform(0, 1, n) * max_storage
+    p2p_price = rng.uniform(0, 0.4, n)
+    slots = rng.integers(0, len(prices), n)
+
+    batch = np.column_stack(decide_energy_distribution_batch(
+        production, consumption, current_storage, max_storage, prices, 0, p2p_price,
+        look_ahead_hours, enable_proactive_buying, slots
+    ))
+    scalar = np.array([
+        decide_energy_distribution(
+            production[i], consumption[i], current_storage[i], max_storage[i], prices, 0, p2p_price[i],
+            look_ahead_hours, enable_proactive_buying, int(slots[i])
+        )
+        for i in range(n)
+    ])
+    np.testing.assert_array_equal(batch, scalar)
+
+
+def test_batch_by_hour_matches_scalar():
+    prices = read_price_csv()
+    rng = np.random.default_rng(1)
+    n = 500
+    production, consumption = rng.uniform(0, 5, n), rng.uniform(0, 5, n)
+    current_storage = rng.uniform(0, 10, n)
+    hours = rng.integers(0, 24, n)
+
+    batch = np.column_stack(decide_energy_distribution_batch(
+        production, consumption, current_storage, 10.0, prices, hours, 0.1
+    ))
+    scalar = np.array([
+        decide_energy_distribution(production[i], consumption[i], current_storage[i], 10.0, prices, int(hours[i]), 0.1)
+        for i in range(n)
+    ])
+    np.testing.assert_array_equal(batch, scalar)
+
+
+def test_cost_batch_matches_scalar():
+    prices = read_price_csv()
+    rng = np.random.default_rng(2)
+    n = 500
+    buy, sell, p2p, take = (rng.uniform(0, 3, n) for _ in range(4))
+    hours = rng.integers(0, 24, n)
+    p2p_price = rng.uniform(0, 0.4, n)
+
+    batch = calculate_cost_batch(buy, sell, p2p, take, prices, hours, p2p_price)
+    scalar = [
+        calculate_cost(buy[i], sell[i], p2p[i], take[i], prices, int(hours[i]), p2p_price[i]) for i in range(n)
+    ]
+    np.testing.assert_array_equal(batch, scalar)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from src.decisions.cost_accumulator import COST_FIELDS, CostAccumulator
+
+
+def _filled(n_households=1500):
+    # More households than the initial capacity, so the store grows
+    accumulator = CostAccumulator(capacity=4)
+    rng = np.random.default_rng(0)
+    ids = [f"h{i}" for i in rng.integers(0, n_households, 3000)]
+    values = rng.uniform(0, 2, (6, len(ids)))
+    accumulator.record_batch(ids, *values)
+    accumulator.record("h0", 1.5, 2.0, 0.5, 0.0, 0.25, 0.0)
+    return accumulator
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "costs.npz")
+    accumulator = _filled()
+    accumulator.snapshot(path)
+    assert not accumulator.dirty
+
+    restored = CostAccumulator()
+    assert restored.restore(path)
+    assert len(restored) == len(accumulator)
+    assert restored.totals() == accumulator.totals()
+
+    # Restored totals keep accumulating, and new households still get rows
+    for target in (accumulator, restored):
+        target.record("h0", 1.0, 1.0, 1.0, 0.0, 0.0, 0.0)
+        target.record("new", 2.0, 3.0, 2.0, 0.0, 0.0, 0.0)
+    assert restored.totals() == accumulator.totals()
+    assert restored.totals(["new"])["new"]["savings"] == 1.0
+
+
+def test_restore_without_snapshot(tmp_path):
+    assert not CostAccumulator().restore(str(tmp_path / "missing.npz"))
+
+
+def _write(path, ids, totals, fields):
+    with open(path, "wb") as f:
+        np.savez(f, ids=np.array(ids, dtype=str), totals=totals, fields=np.array(fields))
+
+
+@pytest.mark.parametrize("fields", [
+    COST_FIELDS[:-1],
+    COST_FIELDS + ("extra",),
+    ("baseline_cost",) + COST_FIELDS[1:],
+])
+def test_restore_rejects_other_fields(tmp_path, fields):
+    path = str(tmp_path / "costs.npz")
+    _write(path, ["a", "b"], np.ones((2, len(fields))), fields)
+    accumulator = _filled(10)
+    before = accumulator.totals()
+
+    with pytest.raises(ValueError, match="different fields"):
+        accumulator.restore(path)
+    assert accumulator.totals() == before
+
+
+@pytest.mark.parametrize("shape", [(3, len(COST_FIELDS)), (1, len(COST_FIELDS)), (2, len(COST_FIELDS) + 1), (14,)])
+def test_restore_rejects_other_shapes(tmp_path, shape):
+    path = str(tmp_path / "costs.npz")
+    _write(path, ["a", "b"], np.ones(shape), COST_FIELDS)
+    accumulator = _filled(10)
+    before = accumulator.totals()
+
+    with pytest.raises(ValueError, match="shape"):
+        accumulator.restore(path)
+    assert accumulator.totals() == before
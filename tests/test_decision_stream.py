@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from src.agents.decision_stream import DecisionStreamServer
+
+
+class _Input:
+    def __init__(self, value: float):
+        self.value = value
+
+    @classmethod
+    def parse_raw(cls, line: bytes) -> "_Input":
+        return cls(float(json.loads(line)["value"]))
+
+
+class _Output:
+    def __init__(self, value: float):
+        self.value = value
+
+    def json(self) -> str:
+        return json.dumps({"value": self.value})
+
+
+def _exchange(decide_batch, lines):
+    """Send lines over one connection in a single batch and read one reply per line"""
+    async def run():
+        server = DecisionStreamServer(_Input, decide_batch, max_delay=0.05)
+        await server.start("127.0.0.1", 0)
+        port = server._server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"".join(line + b"\n" for line in lines))
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in lines]
+        writer.close()
+        await server.stop()
+        return replies, server.stats()
+
+    return asyncio.run(run())
+
+
+def test_bad_inputs_fail_only_their_line():
+    async def decide_batch(inputs):
+        return [_Output(2 * item.value) if item.value >= 0 else ValueError("Negative value") for item in inputs]
+
+    replies, stats = _exchange(decide_batch, [b'{"value": 1}', b"garbage", b'{"value": -1}', b'{"value": 2}'])
+
+    assert replies[0] == {"value": 2.0} and replies[3] == {"value": 4.0}
+    assert replies[1]["error"].startswith("Invalid input")
+    assert replies[2] == {"error": "Negative value"}
+    assert stats["batches"] == 1 and stats["errors"] == 2
+
+
+def test_failed_batch_keeps_parse_errors():
+    async def decide_batch(inputs):
+        raise RuntimeError("Executor is down")
+
+    replies, stats = _exchange(decide_batch, [b'{"value": 1}', b"garbage"])
+
+    assert replies[0] == {"error": "Executor is down"}
+    assert replies[1]["error"].startswith("Invalid input")
+    assert stats["errors"] == 2
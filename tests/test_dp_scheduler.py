@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.decisions.dp_scheduler import _stage_cost, solve_storage_schedule
+from src.decisions.trading import read_price_csv
+
+
+def _brute_force_cost(load, purchase, sale, max_storage, levels, reach, start_level, terminal_price):
+    """Cheapest total cost (including the terminal value) by trying every transition, O(levels^2) per step"""
+    level_size = max_storage / (levels - 1)
+    values = -terminal_price * np.arange(levels) * level_size
+    for t in range(len(load) - 1, -1, -1):
+        new_values = np.full(levels, np.inf)
+        for level in range(levels):
+            for next_level in range(max(0, level - reach), min(levels - 1, level + reach) + 1):
+                charge = (next_level - level) * level_size
+                cost = _stage_cost(load[t], purchase[t], sale[t], charge) + values[next_level]
+                new_values[level] = min(new_values[level], cost)
+        values = new_values
+    return values[start_level]
+
+
+@pytest.mark.parametrize("max_rate", [None, 2.0])
+@pytest.mark.parametrize("seed", range(5))
+def test_schedule_matches_brute_force(seed, max_rate):
+    prices = read_price_csv()
+    rng = np.random.default_rng(seed)
+    levels, max_storage, look_ahead_hours = 21, 10.0, 8
+    level_size = max_storage / (levels - 1)
+    start_level = int(rng.integers(0, levels))
+    production_forecast = rng.uniform(0, 4, look_ahead_hours).tolist()
+    consumption_forecast = rng.uniform(0, 4, look_ahead_hours).tolist()
+    hour = int(rng.integers(0, 24))
+    terminal_price = float(prices.sale.mean())
+
+    schedule = solve_storage_schedule(
+        production_forecast[0], consumption_forecast[0], start_level * level_size, max_storage, prices, hour,
+        look_ahead_hours=look_ahead_hours,
+        production_forecast=production_forecast,
+        consumption_forecast=consumption_forecast,
+        levels=levels,
+        max_rate=max_rate,
+        terminal_price=terminal_price
+    )
+
+    load = np.array(consumption_forecast) - np.array(production_forecast)
+    purchase = prices.purchase[schedule.slots]
+    sale = np.minimum(prices.sale, prices.purchase)[schedule.slots]
+    reach = levels - 1 if max_rate is None else int(max_rate // level_size)
+    expected = _brute_force_cost(load, purchase, sale, max_storage, levels, reach, start_level, terminal_price)
+
+    final_storage = start_level * level_size + schedule.charge.sum()
+    assert schedule.cost - terminal_price * final_storage == pytest.approx(expected, abs=1e-9)
+    if max_rate is not None:
+        assert np.all(np.abs(schedule.charge) <= max_rate + 1e-9)
+    assert 0 - 1e-9 <= final_storage <= max_storage + 1e-9
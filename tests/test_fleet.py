@@ -0,0 +1,124 @@
+from datetime import datetime
+from types import SimpleNamespace
+import asyncio
+
+import numpy as np
+
+from src.decisions.decision_cache import DecisionCache
+from src.decisions.executor import DecisionExecutor
+from src.decisions.fleet import DecisionArrays, decide_arrays
+from src.decisions.strategies import Strategy, build_registry
+from src.decisions.trading import PriceTable, decide_energy_distribution, read_price_csv
+
+
+def _input(**fields):
+    values = dict(
+        hour=8, production=1.0, consumption=2.5, storage_levels={"a": {"current_level": 3.0, "capacity": 13.5}},
+        p2p_base_price=0.1, timestamp=None, tariff_id=None, strategy=None, household_id=None,
+        production_forecast=None, consumption_forecast=None
+    )
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def _decide(inputs, prices, registry=None):
+    executor = DecisionExecutor(registry or build_registry(), mode="inline")
+
+    async def get_prices(tariff_id):
+        if tariff_id is not None:
+            raise ValueError(f"Unknown tariff: {tariff_id}")
+        return prices
+
+    return asyncio.run(decide_arrays(inputs, executor, get_prices))
+
+
+def _rows(results, rows):
+    return np.column_stack((
+        results.energy_to_storage, results.sell_to_grid, results.buy_from_grid, results.take_from_storage
+    ))[rows]
+
+
+def test_bad_storage_levels_fail_only_their_row():
+    prices = read_price_csv()
+    good = [_input(hour=hour) for hour in range(6)]
+    inputs = good[:3] + [_input(storage_levels={"a": 5})] + good[3:]
+
+    arrays = DecisionArrays.from_inputs(inputs)
+    assert list(arrays.failed) == [3]
+    results = _decide(arrays, prices)
+    expected = _decide(DecisionArrays.from_inputs(good), prices)
+
+    assert list(results.failed) == [3]
+    np.testing.assert_array_equal(_rows(results, [0, 1, 2, 4, 5, 6]), _rows(expected, slice(None)))
+    np.testing.assert_array_equal(_rows(results, [3]), [[0.0, 0.0, 2.5, 0.0]])
+
+
+def test_non_finite_columns_fail_only_their_row():
+    arrays = DecisionArrays.from_columns(
+        hour=[1, 2, 3], production=[1.0, np.nan, 1.0], consumption=[2.0, 2.0, np.inf],
+        current_storage=[0.0, 0.0, 0.0], max_storage=[5.0, 5.0, 5.0], p2p_price=[0.1, 0.1, 0.1]
+    )
+    assert sorted(arrays.failed) == [1, 2]
+    results = _decide(arrays, read_price_csv())
+    assert sorted(results.failed) == [1, 2]
+    assert np.isfinite(results.cost).all()
+
+
+def test_timestamps_outside_the_series_fail_only_their_row():
+    hourly = read_price_csv()
+    series = PriceTable(np.tile(hourly.purchase, 2), np.tile(hourly.sale, 2), start=datetime(2025, 1, 1))
+    inputs = [
+        _input(timestamp=datetime(2025, 1, 1, 5)),
+        _input(timestamp=datetime(2025, 1, 3, 5)),
+        _input(hour=30),
+        _input(hour=48),
+        # Only its timestamp selects the slot, so its hour is never checked
+        _input(hour=99, timestamp=datetime(2025, 1, 2, 5)),
+    ]
+    results = _decide(DecisionArrays.from_inputs(inputs), series)
+
+    assert sorted(results.failed) == [1, 3]
+    for row, slot in ((0, 5), (2, 30), (4, 29)):
+        np.testing.assert_array_equal(
+            _rows(results, row), decide_energy_distribution(1.0, 2.5, 3.0, 13.5, series, 0, 0.1, slot=slot)
+        )
+
+
+def test_strategy_errors_fail_only_their_household():
+    registry = build_registry()
+
+    def picky(production, **kwargs):
+        if production > 2:
+            raise ValueError("Too much production")
+        return decide_energy_distribution(production=production, **kwargs)
+
+    registry.register(Strategy("picky", picky))
+    inputs = [_input(production=production, strategy="picky") for production in (1.0, 3.0, 0.5)]
+    inputs.append(_input(tariff_id="missing"))
+    results = _decide(DecisionArrays.from_inputs(inputs), read_price_csv(), registry)
+
+    assert results.failed == {1: "Too much production", 3: "Unknown tariff: missing"}
+    np.testing.assert_array_equal(_rows(results, [1, 3]), [[0.0, 0.0, 2.5, 0.0]] * 2)
+    prices = read_price_csv()
+    for row, production in ((0, 1.0), (2, 0.5)):
+        np.testing.assert_array_equal(
+            _rows(results, row), decide_energy_distribution(production, 2.5, 3.0, 13.5, prices, 8, 0.1)
+        )
+
+
+def test_cached_heuristic_batches_match_single_decisions():
+    prices = read_price_csv()
+    cache = DecisionCache(energy_resolution=0.5, price_resolution=0.05)
+    registry = build_registry(heuristic=cache.decide)
+    inputs = [_input(hour=hour, production=0.3 * hour, p2p_base_price=0.01 * hour) for hour in range(24)]
+    results = _decide(DecisionArrays.from_inputs(inputs), prices, registry)
+
+    assert cache.stats()["misses"] + cache.stats()["hits"] == len(inputs)
+    for row, msg in enumerate(inputs):
+        np.testing.assert_array_equal(
+            _rows(results, row),
+            registry.decide(
+                None, prices, production=msg.production, consumption=2.5, current_storage=3.0,
+                max_storage=13.5, hour=msg.hour, p2p_price=msg.p2p_base_price
+            )
+        )
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.decisions.ledger import CostLedger
+from src.decisions.trading import PriceTable, calculate_cost, read_price_csv
+
+
+def _tables():
+    hourly = read_price_csv()
+    return {"flat": hourly, "peak": PriceTable(hourly.purchase * 1.5, hourly.sale * 0.8)}
+
+
+def _trace(n_households=4, steps=48, seed=0):
+    rng = np.random.default_rng(seed)
+    decisions = {
+        name: rng.uniform(0, 3, (n_households, steps)) * (rng.random((n_households, steps)) < 0.6)
+        for name in ("buy_from_grid", "sell_to_grid", "sell_to_p2p", "take_from_storage")
+    }
+    p2p_price = rng.uniform(0.05, 0.3, (n_households, steps))
+    return decisions, p2p_price
+
+
+def _assert_matches_scalar(decisions, p2p_price, slots, households, tariffs, tables):
+    """Build a ledger and compare every total with calculate_cost summed decision by decision"""
+    ledger = CostLedger.build(
+        **decisions, grid_prices=tables, slots=slots, p2p_price=p2p_price, households=households, tariffs=tariffs
+    )
+    n_households, steps = p2p_price.shape
+    scalar = np.array([
+        [
+            calculate_cost(
+                *(decisions[name][row, step] for name in (
+                    "buy_from_grid", "sell_to_grid", "sell_to_p2p", "take_from_storage"
+                )),
+                tables[tariffs[row]], 0, p2p_price[row, step], slot=int(slots[step])
+            )
+            for step in range(steps)
+        ]
+        for row in range(n_households)
+    ])
+    days = np.concatenate(([0], np.cumsum(np.diff(slots) <= 0)))
+
+    assert ledger.total() == pytest.approx(scalar.sum(), abs=1e-9)
+    ids, per_household = ledger.per_household()
+    assert ids.tolist() == list(households)
+    np.testing.assert_allclose(per_household, scalar.sum(axis=1), atol=1e-9)
+    labels, per_household_day = ledger.per_household_day()
+    np.testing.assert_array_equal(labels, np.unique(days))
+    np.testing.assert_allclose(
+        per_household_day, np.column_stack([scalar[:, days == day].sum(axis=1) for day in labels]), atol=1e-9
+    )
+    _, per_day = ledger.per_day()
+    np.testing.assert_allclose(per_day, per_household_day.sum(axis=0), atol=1e-9)
+    tariff_ids, per_tariff = ledger.per_tariff()
+    for tariff_id, total in zip(tariff_ids, per_tariff):
+        rows = [row for row in range(n_households) if tariffs[row] == tariff_id]
+        assert total == pytest.approx(scalar[rows].sum(), abs=1e-9)
+
+
+def test_ledger_matches_scalar_costs():
+    decisions, p2p_price = _trace()
+    slots = np.arange(48) % 24
+    _assert_matches_scalar(
+        decisions, p2p_price, slots, ["a", "b", "c", "d"], ["flat", "peak", "flat", "peak"], _tables()
+    )
+
+
+def test_ledger_after_replacing_and_removing_decisions():
+    decisions, p2p_price = _trace(seed=1)
+    slots = (np.arange(48) + 20) % 24
+    households, tariffs = ["a", "b", "c", "d"], ["peak", "flat", "flat", "peak"]
+
+    # Replace some decisions with new values
+    replaced = {name: values.copy() for name, values in decisions.items()}
+    replaced["buy_from_grid"][1, 5] = 7.0
+    replaced["sell_to_grid"][3, 30:40] = 0.0
+    replaced["sell_to_p2p"][0, :] = 1.0
+    _assert_matches_scalar(replaced, p2p_price, slots, households, tariffs, _tables())
+
+    # Remove a household and the first steps of the trace
+    keep = [0, 1, 3]
+    removed = {name: values[keep, 10:] for name, values in replaced.items()}
+    _assert_matches_scalar(
+        removed, p2p_price[keep, 10:], slots[10:], [households[row] for row in keep],
+        [tariffs[row] for row in keep], _tables()
+    )
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.decisions.dp_scheduler import solve_storage_schedule
+from src.decisions.lp_dispatch import BUY, CHARGE, DISCHARGE, SELL, STORAGE, LPDispatchSolver, _constraint_matrix
+from src.decisions.trading import read_price_csv
+
+
+@pytest.mark.parametrize("max_rate", [None, 2.0])
+@pytest.mark.parametrize("seed", range(5))
+def test_lp_matches_dp_on_its_grid(seed, max_rate):
+    # Loads, storage and rate on the DP's 0.5 kWh grid put an LP optimum on
+    # that grid too, so the exact LP and the DP reach the same total cost
+    prices = read_price_csv()
+    rng = np.random.default_rng(seed)
+    levels, max_storage, look_ahead_hours = 21, 10.0, 8
+    level_size = max_storage / (levels - 1)
+    current_storage = int(rng.integers(0, levels)) * level_size
+    production_forecast = (rng.integers(0, 9, look_ahead_hours) * level_size).tolist()
+    consumption_forecast = (rng.integers(0, 9, look_ahead_hours) * level_size).tolist()
+    hour = int(rng.integers(0, 24))
+    terminal_price = float(prices.sale.mean())
+    arguments = dict(
+        production=production_forecast[0], consumption=consumption_forecast[0], current_storage=current_storage,
+        max_storage=max_storage, grid_prices=prices, hour=hour, look_ahead_hours=look_ahead_hours,
+        production_forecast=production_forecast, consumption_forecast=consumption_forecast,
+        max_rate=max_rate, terminal_price=terminal_price
+    )
+
+    lp = LPDispatchSolver().solve(**arguments)
+    dp = solve_storage_schedule(levels=levels, **arguments)
+
+    def total(schedule):
+        return schedule.cost - terminal_price * (current_storage + schedule.charge.sum())
+
+    np.testing.assert_array_equal(lp.slots, dp.slots)
+    assert total(lp) == pytest.approx(total(dp), abs=1e-9)
+    storage = current_storage + np.cumsum(lp.charge)
+    assert np.all(storage >= -1e-9) and np.all(storage <= max_storage + 1e-9)
+    if max_rate is not None:
+        assert np.all(np.abs(lp.charge) <= max_rate + 1e-9)
+
+
+@pytest.mark.parametrize("horizon", [1, 2, 24, 96])
+def test_constraint_matrix_encodes_balance_and_dynamics(horizon):
+    rng = np.random.default_rng(horizon)
+    charge = rng.uniform(0, 2, horizon)
+    discharge = rng.uniform(0, 2, horizon)
+    load = rng.uniform(-3, 3, horizon)
+    initial = 5.0
+    grid = load + charge - discharge
+
+    solution = np.zeros((5, horizon))
+    solution[BUY], solution[SELL] = np.maximum(grid, 0.0), np.maximum(-grid, 0.0)
+    solution[CHARGE], solution[DISCHARGE] = charge, discharge
+    solution[STORAGE] = initial + np.cumsum(charge - discharge)
+
+    matrix = _constraint_matrix(horizon)
+    assert matrix.shape == (2 * horizon, 5 * horizon)
+    rhs = matrix @ solution.ravel()
+    np.testing.assert_allclose(rhs[:horizon], load, atol=1e-12)
+    np.testing.assert_allclose(rhs[horizon:], np.concatenate(([initial], np.zeros(horizon - 1))), atol=1e-12)
+
+
+def test_constraint_matrix_is_cached_per_horizon():
+    assert _constraint_matrix(24) is _constraint_matrix(24)
+    assert _constraint_matrix(24) is not _constraint_matrix(23)
+    assert _constraint_matrix(23).shape == (46, 115)
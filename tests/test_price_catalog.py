@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from src.decisions import trading
+from src.decisions.trading import PriceCatalog
+
+GOOD = "Hour,Purchase,Sale\n" + "".join(
+    f"{hour:02d}:00 - {(hour + 1) % 24:02d}:00,0.30,0.10\n" for hour in range(24)
+)
+BROKEN = "Hour,Purchase,Sale\n" + "".join(
+    f"{hour:02d}:00 - {(hour + 1) % 24:02d}:00,0.00,0.00\n" for hour in range(24)
+)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    load_price_table = trading.load_price_table
+
+    def counting(path, *args, **kwargs):
+        calls.append(path)
+        return load_price_table(path, *args, **kwargs)
+
+    monkeypatch.setattr(trading, "load_price_table", counting)
+    return calls
+
+
+def test_broken_tariff_is_parsed_once_until_it_changes(tmp_path, loads):
+    path = tmp_path / "bad.csv"
+    path.write_text(BROKEN)
+    catalog = PriceCatalog(str(tmp_path))
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            catalog.get("bad")
+    assert len(loads) == 1
+    assert catalog.peek("bad") is None
+
+    path.write_text(GOOD)
+    os.utime(path, ns=(0, 1))
+    assert catalog.get("bad").purchase[0] == pytest.approx(0.30)
+    assert len(loads) == 2
+    assert catalog.peek("bad") is not None
+
+
+def test_loaded_tariffs_are_not_read_again(tmp_path, loads):
+    (tmp_path / "good.csv").write_text(GOOD)
+    catalog = PriceCatalog(str(tmp_path))
+
+    tables = [catalog.get("good") for _ in range(3)]
+    assert all(table is tables[0] for table in tables)
+    assert len(loads) == 1 and catalog.stats()["loads"] == 1
@@ -0,0 +1,94 @@
+from dataclasses import astuple
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.decisions.price_stream import StreamingPriceState
+from src.decisions.trading import PriceTable, SlotStats, SpikeContext
+
+
+def _assert_stats_match(state):
+    table = state.to_table()
+    expected = SlotStats.build(PriceTable(table.purchase, table.sale, slot_minutes=table.slot_minutes, start=table.start))
+    for name in ("mean_purchase", "purchase_spike_threshold"):
+        np.testing.assert_allclose(getattr(table.slot_stats, name), getattr(expected, name), rtol=1e-9, atol=1e-12)
+    # The percentile is an order statistic, so it is exact
+    np.testing.assert_array_equal(table.slot_stats.high_sale_threshold, expected.high_sale_threshold)
+    for slot in (0, len(state) - 1):
+        assert state.day_stats(slot).purchase_spike_threshold == pytest.approx(
+            expected.purchase_spike_threshold[slot], rel=1e-9
+        )
+
+
+def _assert_spike_context_matches(state, look_ahead_hours):
+    table = state.to_table(look_ahead_hours)
+    fresh = PriceTable(table.purchase, table.sale, slot_minutes=table.slot_minutes, start=table.start)
+    streamed = table.spike_context(look_ahead_hours)
+    expected = SpikeContext.build(fresh, look_ahead_hours)
+    for streamed_field, expected_field in zip(astuple(streamed)[:-1], astuple(expected)[:-1]):
+        np.testing.assert_allclose(streamed_field, expected_field, rtol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_updates_match_slot_stats(seed):
+    rng = np.random.default_rng(seed)
+    n = 96
+    # Few distinct values so updates often hit duplicates
+    state = StreamingPriceState(rng.integers(1, 20, n) / 40, rng.integers(1, 10, n) / 40, slot_minutes=15)
+    for _ in range(500):
+        slot = int(rng.integers(0, n))
+        choice = rng.integers(0, 3)
+        state.update(
+            slot,
+            purchase=rng.integers(1, 20) / 40 if choice != 1 else None,
+            sale=rng.integers(1, 10) / 40 if choice != 0 else None
+        )
+        _assert_stats_match(state)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_appends_and_updates_match_slot_stats(seed):
+    rng = np.random.default_rng(seed)
+    # Starts mid-day, so the first day is partial and appends cross into new days
+    state = StreamingPriceState(
+        rng.uniform(0.1, 0.5, 24), rng.uniform(0.05, 0.2, 24), start=datetime(2025, 1, 1, 9)
+    )
+    for step in range(300):
+        if rng.random() < 0.5:
+            state.append(rng.uniform(0.1, 0.5), rng.uniform(0.05, 0.2))
+        else:
+            state.update(int(rng.integers(0, len(state))), rng.uniform(0.1, 0.5), rng.uniform(0.05, 0.2))
+        _assert_stats_match(state)
+        if step % 25 == 0:
+            _assert_spike_context_matches(state, 8)
+
+
+def test_days_keep_their_own_thresholds():
+    # Day 2 at twice day 1's prices: each day's spikes and good sell hours are relative to that day
+    rng = np.random.default_rng(0)
+    purchase, sale = rng.uniform(0.1, 0.5, 24), rng.uniform(0.05, 0.2, 24)
+    state = StreamingPriceState(
+        np.concatenate((purchase, 2 * purchase)), np.concatenate((sale, 2 * sale)), start=datetime(2025, 1, 1)
+    )
+
+    table = state.to_table()
+    assert state.day_stats(30).purchase_spike_threshold == pytest.approx(
+        2 * state.day_stats(5).purchase_spike_threshold
+    )
+    assert [state.is_spike(slot) for slot in range(24)] == [state.is_spike(slot) for slot in range(24, 48)]
+    _assert_stats_match(state)
+    _assert_spike_context_matches(state, 24)
+    assert state.to_table() is table
+
+    state.update(3, purchase=1.0)
+    assert state.to_table() is not table
+    assert state.is_spike(3) and not state.is_spike(27)
+    _assert_stats_match(state)
+    _assert_spike_context_matches(state, 24)
+
+
+def test_daily_profile_cannot_grow():
+    state = StreamingPriceState([0.3] * 24, [0.1] * 24)
+    with pytest.raises(ValueError):
+        state.append(0.3, 0.1)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from src.decisions.savings import BASELINES, SavingsEngine
+from src.decisions.trading import calculate_cost, read_price_csv
+
+
+def _scalar_costs(production, consumption, buy, sell, sell_p2p, p2p_price, slots, prices):
+    """Strategy and baseline costs per household with calculate_cost, one decision at a time"""
+    n_households, steps = production.shape
+    costs = {name: np.zeros(n_households) for name in ("strategy", "no_battery", "grid_only")}
+    for row in range(n_households):
+        for step in range(steps):
+            slot = int(slots[step])
+            net_load = consumption[row, step] - production[row, step]
+            costs["strategy"][row] += calculate_cost(
+                buy[row, step], sell[row, step], sell_p2p[row, step], 0.0, prices, 0, p2p_price[row, step], slot=slot
+            )
+            costs["no_battery"][row] += calculate_cost(
+                max(net_load, 0.0), max(-net_load, 0.0), 0.0, 0.0, prices, 0, 0.0, slot=slot
+            )
+            costs["grid_only"][row] += calculate_cost(consumption[row, step], 0.0, 0.0, 0.0, prices, 0, 0.0, slot=slot)
+    return costs
+
+
+def test_savings_match_scalar_costs():
+    prices = read_price_csv()
+    rng = np.random.default_rng(0)
+    n_households, steps = 6, 48
+    production = rng.uniform(0, 4, (n_households, steps))
+    consumption = rng.uniform(0, 4, (n_households, steps))
+    buy = rng.uniform(0, 3, (n_households, steps))
+    sell = rng.uniform(0, 3, (n_households, steps))
+    sell_p2p = rng.uniform(0, 1, (n_households, steps))
+    p2p_price = rng.uniform(0.05, 0.3, (n_households, steps))
+    slots = np.arange(steps) % 24
+
+    engine = SavingsEngine(n_households, prices)
+    # One chunk per day; the second day arrives in two groups of households
+    engine.add(
+        production[:, :24], consumption[:, :24], buy[:, :24], sell[:, :24], sell_p2p[:, :24], slots[:24],
+        p2p_price[:, :24]
+    )
+    for rows in (slice(0, 4), np.array([4, 5])):
+        engine.add(
+            production[rows, 24:], consumption[rows, 24:], buy[rows, 24:], sell[rows, 24:], sell_p2p[rows, 24:],
+            slots[24:], p2p_price[rows, 24:], rows=rows
+        )
+
+    expected = _scalar_costs(production, consumption, buy, sell, sell_p2p, p2p_price, slots, prices)
+    totals = engine.totals()
+    summary = engine.summary()
+    assert engine.decisions == n_households * steps
+    assert set(engine.baselines) == set(BASELINES)
+    np.testing.assert_allclose(totals["strategy"], expected["strategy"], atol=1e-9)
+    for name in BASELINES:
+        np.testing.assert_allclose(totals[name], expected[name], atol=1e-9)
+        np.testing.assert_allclose(engine.savings(name), expected[name] - expected["strategy"], atol=1e-9)
+        assert summary[f"savings_vs_{name}"] == pytest.approx(expected[name].sum() - expected["strategy"].sum())